@@ -0,0 +1,56 @@
+# benchmarks/expansion.py
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.wordlist import Wordlist, Expansion
+
+WORDLIST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'wordlists', 'common.txt')
+# Mutation sets checked by default, as keyword arguments for Expansion
+CASES = [
+    {'extensions': ['php']},
+    {'cases': ['lower'], 'extensions': ['php']},
+    {'cases': ['lower', 'upper', 'capitalize'], 'extensions': ['php', 'bak'], 'backups': ['~', '.bak']},
+    {'cases': ['lower'], 'extensions': ['php', 'txt'], 'suffixes': ['-old', '_1'], 'backups': ['~', '.old']},
+]
+
+def check(wordlist, mutations):
+    """
+    Expands `wordlist` with `mutations` once. Returns the candidate count, the distinct count and what len() says.
+    """
+    expansion = Expansion(wordlist, **mutations)
+    started = time.monotonic()
+    candidates = list(expansion)
+    elapsed = time.monotonic() - started
+    return {
+        'mutations': mutations,
+        'candidates': len(candidates),
+        'unique': len(set(candidates)),
+        'len': len(expansion),
+        'seconds': round(elapsed, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fails (exit 1) if a wordlist Expansion yields a candidate twice or len() disagrees with it."
+    )
+    parser.add_argument("--wordlist", help="Wordlist to expand. Default: wordlists/common.txt", default=WORDLIST)
+    args = parser.parse_args()
+
+    wordlist = Wordlist(args.wordlist)
+    results = [check(wordlist, mutations) for mutations in CASES]
+    report = {
+        'wordlist': args.wordlist,
+        'results': results,
+        'ok': all(result['candidates'] == result['unique'] == result['len'] for result in results),
+    }
+    print(json.dumps(report, indent=4))
+    sys.exit(0 if report['ok'] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# benchmarks/run.py
+
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.servers import StandInHTTPServer, StandInDNSServer, Listeners, serve_in_thread
+
+MODULES = ('webscan', 'webscan-fast', 'dnsenum', 'portscan')
+ZONE = 'bench.lab'
+
+def percentile(samples, fraction):
+    """
+    Nearest-rank percentile of `samples`, or None if there are none.
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MiB (ru_maxrss is KiB on Linux, bytes on macOS).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+@contextmanager
+def timed(owner, name, samples):
+    """
+    Temporarily wraps `owner.name` (a function or coroutine function) so the duration of every call
+    is appended to `samples`, in seconds. The original is always called and restored afterwards.
+    """
+    original = getattr(owner, name)
+    if asyncio.iscoroutinefunction(original):
+        @functools.wraps(original)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+    else:
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - started)
+    setattr(owner, name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(owner, name, original)
+
+@contextmanager
+def observed(metric, samples):
+    """
+    Temporarily taps utils.profiler.observe() so every latency the scan reports under `metric` is appended
+    to `samples`, in seconds. Works for both webscan engines, which time their requests differently.
+    """
+    from utils import profiler
+    original = profiler.observe
+
+    def tap(name, key, seconds):
+        if name == metric:
+            samples.append(seconds)
+        original(name, key, seconds)
+
+    profiler.observe = tap
+    try:
+        yield
+    finally:
+        profiler.observe = original
+
+def cpu_seconds():
+    """
+    User plus system CPU time used by this process (all threads) so far.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def silent_console():
+    """
+    A console that renders normally (progress bars included) into /dev/null, so runs pay the usual output cost
+    without mixing into the JSON report on stdout.
+    """
+    return Console(file=open(os.devnull, 'w'))
+
+def write_wordlist(path, real, size, seed):
+    """
+    Writes `size` random words with the `real` ones mixed in at random positions.
+    """
+    rng = random.Random(seed)
+    words = [f"{rng.getrandbits(48):012x}" for _ in range(max(0, size - len(real)))]
+    for word in real:
+        words.insert(rng.randrange(len(words) + 1), word)
+    with open(path, 'w') as f:
+        f.write('\n'.join(words) + '\n')
+
+def bench_webscan(config):
+    """
+    Runs webscan.run_scan in this (fresh) process with the configured engine; returns timings, CPU time, hits and peak RSS.
+    """
+    from modules import webscan
+    console = silent_console()
+    samples = []
+    started = time.perf_counter()
+    cpu_started = cpu_seconds()
+    with observed('http', samples):
+        results = webscan.run_scan('127.0.0.1', config['url'], True, config['wordlist'], False, None, console,
+                                   config['concurrency'] or webscan.DEFAULT_CONCURRENCY, adaptive=config['adaptive'],
+                                   engine=config['engine'])
+    cpu = cpu_seconds() - cpu_started
+    elapsed = time.perf_counter() - started
+    found = [hit['url'][len(config['url']):].rstrip('/') for hit in (results or {}).get('dir_brute_results', [])]
+    return {'elapsed': elapsed, 'cpu': cpu, 'samples': samples, 'found': found, 'peak_rss_mb': peak_rss_mb()}
+
+def bench_dnsenum(config):
+    """
+    Runs dnsenum.run_scan in this (fresh) process; returns timings, hits and peak RSS.
+    """
+    import dns.asyncresolver
+    from modules import dnsenum
+    console = silent_console()
+    samples = []
+    started = time.perf_counter()
+    with timed(dns.asyncresolver.Resolver, 'resolve', samples):
+        results = dnsenum.run_scan(ZONE, True, config['wordlist'], config['nameserver'], False, None, console,
+                                   config['concurrency'] or dnsenum.DEFAULT_CONCURRENCY, adaptive=config['adaptive'])
+    elapsed = time.perf_counter() - started
+    found = [hit['subdomain'][:-len(ZONE) - 1] for hit in results.get('subdomains', [])]
+    return {'elapsed': elapsed, 'samples': samples, 'found': found, 'peak_rss_mb': peak_rss_mb()}
+
+def bench_portscan(config):
+    """
+    Runs the portscan connect sweep (run_prescan) in this (fresh) process; nmap itself is not benchmarked.
+    """
+    from modules import portscan
+    console = silent_console()
+    samples = []
+    started = time.perf_counter()
+    with timed(asyncio, 'open_connection', samples):
+        _, open_ports, _ = portscan.run_prescan('127.0.0.1', config['ports'], False,
+                                                config['concurrency'] or portscan.DEFAULT_CONCURRENCY,
+                                                portscan.DEFAULT_CONNECT_TIMEOUT, console)
+    elapsed = time.perf_counter() - started
+    return {'elapsed': elapsed, 'samples': samples, 'found': [str(port) for port in open_ports], 'peak_rss_mb': peak_rss_mb()}
+
+def run_isolated(func, config):
+    """
+    Runs `func(config)` in a freshly spawned process, so peak RSS only covers that module's run.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(func, config).result()
+
+def summarize(run, requests, expected):
+    """
+    Turns a raw run into the reported metrics. `expected` are the names a perfect scan finds.
+    """
+    found = set(run['found'])
+    expected = set(expected)
+    return {
+        'requests': requests,
+        'elapsed_s': round(run['elapsed'], 3),
+        'requests_per_sec': round(requests / run['elapsed'], 1) if run['elapsed'] else None,
+        'latency_ms': {
+            'p50': round(percentile(run['samples'], 0.50) * 1000, 2) if run['samples'] else None,
+            'p99': round(percentile(run['samples'], 0.99) * 1000, 2) if run['samples'] else None,
+        },
+        'peak_rss_mb': run['peak_rss_mb'],
+        'cpu_s': round(run['cpu'], 3) if 'cpu' in run else None,
+        'cpu_ms_per_request': round(run['cpu'] * 1000 / requests, 3) if 'cpu' in run and requests else None,
+        'recall': round(len(found & expected) / len(expected), 4) if expected else None,
+        'false_positives': len(found - expected),
+    }
+
+def benchmark_webscan(args, workdir, engine='requests'):
+    dirs = [f"dir{i:03d}" for i in range(args.real // 2)]
+    files = [f"page{i:03d}.html" for i in range(args.real - len(dirs))]
+    server = serve_in_thread(StandInHTTPServer(
+        [d + '/' for d in dirs] + files, args.latency_ms / 1000, args.soft_404, args.max_rps
+    ))
+    try:
+        wordlist = os.path.join(workdir, 'web.txt')
+        write_wordlist(wordlist, dirs + files, args.size, args.seed)
+        run = run_isolated(bench_webscan, {
+            'url': server.url, 'wordlist': wordlist, 'concurrency': args.concurrency, 'adaptive': not args.no_adaptive,
+            'engine': engine
+        })
+        result = summarize(run, server.requests, dirs + files)
+        result['throttled'] = server.throttled
+        return result
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def benchmark_dnsenum(args, workdir):
+    labels = [f"host{i:03d}" for i in range(args.real)]
+    records = {label: f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i, label in enumerate(labels, 1)}
+    server = serve_in_thread(StandInDNSServer(ZONE, records, args.latency_ms / 1000))
+    try:
+        wordlist = os.path.join(workdir, 'dns.txt')
+        write_wordlist(wordlist, labels, args.size, args.seed)
+        run = run_isolated(bench_dnsenum, {
+            'nameserver': server.address, 'wordlist': wordlist, 'concurrency': args.concurrency,
+            'adaptive': not args.no_adaptive
+        })
+        return summarize(run, server.queries, labels)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def benchmark_portscan(args, workdir):
+    listeners = Listeners(args.listeners)
+    try:
+        low, high = listeners.ports[0], listeners.ports[-1]
+        run = run_isolated(bench_portscan, {'ports': f"{low}-{high}", 'concurrency': args.concurrency})
+        result = summarize(run, high - low + 1, [str(port) for port in listeners.ports])
+        # Anything else listening on localhost inside the range is a real open port, not a scanner error
+        result['unexpected_open'] = result.pop('false_positives')
+        return result
+    finally:
+        listeners.close()
+
+BENCHMARKS = {
+    'webscan': benchmark_webscan,
+    'webscan-fast': functools.partial(benchmark_webscan, engine='fast'),
+    'dnsenum': benchmark_dnsenum,
+    'portscan': benchmark_portscan,
+}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_summary(report, console):
+    table = Table(title="Benchmark Results")
+    table.add_column("Module", style="cyan")
+    table.add_column("Requests", justify="right")
+    table.add_column("Req/s", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p99 ms", justify="right")
+    table.add_column("CPU ms/req", justify="right")
+    table.add_column("Peak RSS MiB", justify="right")
+    table.add_column("Recall", justify="right")
+    for name, result in report['results'].items():
+        table.add_row(
+            name, str(result['requests']), str(result['requests_per_sec']),
+            str(result['latency_ms']['p50']), str(result['latency_ms']['p99']),
+            str(result['cpu_ms_per_request']), str(result['peak_rss_mb']), str(result['recall'])
+        )
+    console.print(table)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks for reconor's scan modules against local stand-in servers. "
+                    "Prints a JSON report to stdout.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--modules", help=f"Comma-separated modules to benchmark. Default: {','.join(MODULES)}",
+                        default=','.join(MODULES))
+    parser.add_argument("--size", help="Wordlist size for webscan and dnsenum. Default: 5000", type=int, default=5000)
+    parser.add_argument("--real", help="Number of paths/subdomains that really exist. Default: 50", type=int, default=50)
+    parser.add_argument("--listeners", help="Number of localhost TCP listeners for portscan. Default: 20",
+                        type=int, default=20)
+    parser.add_argument("--latency-ms", help="Artificial server latency per request. Default: 0", type=float, default=0.0)
+    parser.add_argument("--soft-404", action="store_true", help="Answer unknown web paths with 200 instead of 404.")
+    parser.add_argument("--max-rps", help="Web server answers 429 beyond this many requests/sec. Default: unlimited",
+                        type=int)
+    parser.add_argument("--concurrency", help="Override each module's default concurrency.", type=int)
+    parser.add_argument("--no-adaptive", action="store_true", help="Disable adaptive rate control in the scans.")
+    parser.add_argument("--seed", help="Seed for the generated wordlists. Default: 1", type=int, default=1)
+    parser.add_argument("-o", "--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    modules = [name.strip() for name in args.modules.split(',') if name.strip()]
+    unknown = [name for name in modules if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown module(s): {', '.join(unknown)}")
+
+    console = Console(stderr=True)
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='reconor-bench-') as workdir:
+        for name in modules:
+            console.print(f"[bold yellow]Benchmarking {name}...[/bold yellow]")
+            report['results'][name] = BENCHMARKS[name](args, workdir)
+
+    print_summary(report, console)
+    output = json.dumps(report, indent=4)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+if __name__ == "__main__":
+    main()
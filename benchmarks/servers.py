@@ -0,0 +1,257 @@
+# benchmarks/servers.py
+
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import dns.flags
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+AXFR_RRSETS_PER_MESSAGE = 200
+
+class StandInHTTPServer(ThreadingHTTPServer):
+    """
+    Local web server with a known set of real paths.
+    Every response is delayed by `latency` seconds. Unknown paths get a 404, or with `soft_404`
+    a 200 "not found" page that echoes the path (so its size varies, like real soft-404 pages).
+    Paths ending in '/' are directories; requesting one without the slash redirects to it.
+    With `max_rps`, requests beyond that many per second are answered with 429.
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, real_paths, latency=0.0, soft_404=False, max_rps=None):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.real_paths = set(real_paths)
+        self.latency = latency
+        self.soft_404 = soft_404
+        self.max_rps = max_rps
+        self.requests = 0
+        self.throttled = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def admit(self):
+        """
+        Counts one request; returns False if it exceeds `max_rps`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            if self.max_rps is None:
+                return True
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.max_rps:
+                self.throttled += 1
+                return False
+            self._recent.append(now)
+            return True
+
+    def handle_error(self, request, client_address):
+        # Scanners drop keep-alive connections whenever they like; only report real failures
+        if not issubclass(sys.exc_info()[0], ConnectionError):
+            super().handle_error(request, client_address)
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; separate small writes stall on delayed ACKs
+    wbufsize = -1
+
+    def do_GET(self):
+        server = self.server
+        admitted = server.admit()
+        if server.latency:
+            time.sleep(server.latency)
+        path = self.path.split('?', 1)[0].lstrip('/')
+        if not admitted:
+            self.reply(429, b"slow down")
+        elif path == '' or path in server.real_paths:
+            self.reply(200, f"<html><title>{path or 'index'}</title><body>real content for {path}</body></html>".encode())
+        elif path + '/' in server.real_paths:
+            self.reply(301, b"", {'Location': '/' + path + '/'})
+        elif server.soft_404:
+            self.reply(200, f"<html><body><h1>Oops</h1><p>The page {path} was not found.</p></body></html>".encode())
+        else:
+            self.reply(404, b"<html><body>404</body></html>")
+
+    def reply(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StandInDNSServer(socketserver.ThreadingUDPServer):
+    """
+    Local DNS stub authoritative for `zone`, answering A queries from `records` (label -> address),
+    plus SOA and NS (ns1.<zone> -> 127.0.0.1) at the apex. Other names get NXDOMAIN and other record types
+    an empty NOERROR answer. Every answer is delayed by `latency` seconds.
+    A TCP listener on the same port serves the same answers and, with `allow_axfr`, zone transfers
+    (otherwise AXFR is REFUSED).
+    """
+    daemon_threads = True
+
+    def __init__(self, zone, records, latency=0.0, allow_axfr=False):
+        super().__init__(('127.0.0.1', 0), StandInDNSHandler)
+        self.zone = zone.rstrip('.').lower()
+        self.records = {f"{label}.{self.zone}".lower(): address for label, address in records.items()}
+        self.records.setdefault(f"ns1.{self.zone}", '127.0.0.1')
+        self.latency = latency
+        self.allow_axfr = allow_axfr
+        self.queries = 0
+        self._lock = threading.Lock()
+        self.tcp = StandInDNSTCPServer(self)
+
+    @property
+    def address(self):
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    def serve_forever(self, poll_interval=0.5):
+        threading.Thread(target=self.tcp.serve_forever, daemon=True).start()
+        super().serve_forever(poll_interval)
+
+    def shutdown(self):
+        self.tcp.shutdown()
+        super().shutdown()
+
+    def server_close(self):
+        self.tcp.server_close()
+        super().server_close()
+
+    def apex_rrsets(self):
+        origin = dns.name.from_text(self.zone)
+        return [
+            dns.rrset.from_text(origin, 60, 'IN', 'SOA', f"ns1.{self.zone}. hostmaster.{self.zone}. 1 3600 600 86400 60"),
+            dns.rrset.from_text(origin, 60, 'IN', 'NS', f"ns1.{self.zone}."),
+        ]
+
+    def answer(self, query):
+        """
+        Builds the response to one (non-AXFR) query.
+        """
+        with self._lock:
+            self.queries += 1
+        if self.latency:
+            time.sleep(self.latency)
+        response = dns.message.make_response(query)
+        response.flags |= dns.flags.AA
+        question = query.question[0]
+        name = question.name.to_text(omit_final_dot=True).lower()
+        if name == self.zone:
+            response.answer.extend(rrset for rrset in self.apex_rrsets() if rrset.rdtype == question.rdtype)
+        elif name in self.records:
+            if question.rdtype == dns.rdatatype.A:
+                response.answer.append(dns.rrset.from_text(question.name, 60, 'IN', 'A', self.records[name]))
+        else:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        return response
+
+    def transfer(self, query):
+        """
+        Yields the messages of a zone transfer: SOA, NS and every A record, closed by the SOA again.
+        """
+        soa, ns = self.apex_rrsets()
+        rrsets = [soa, ns] + [
+            dns.rrset.from_text(name + '.', 60, 'IN', 'A', address) for name, address in sorted(self.records.items())
+        ] + [soa]
+        for start in range(0, len(rrsets), AXFR_RRSETS_PER_MESSAGE):
+            response = dns.message.make_response(query)
+            response.flags |= dns.flags.AA
+            response.answer.extend(rrsets[start:start + AXFR_RRSETS_PER_MESSAGE])
+            yield response
+
+class StandInDNSHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        try:
+            query = dns.message.from_wire(data)
+        except Exception:
+            return
+        sock.sendto(self.server.answer(query).to_wire(), self.client_address)
+
+class StandInDNSTCPServer(socketserver.ThreadingTCPServer):
+    """
+    TCP side of a StandInDNSServer, bound to the same port.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, dns_server):
+        self.dns_server = dns_server
+        super().__init__(('127.0.0.1', dns_server.server_address[1]), StandInDNSTCPHandler)
+
+class StandInDNSTCPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        dns_server = self.server.dns_server
+        while True:
+            header = self._read(2)
+            if not header:
+                return
+            data = self._read(struct.unpack('!H', header)[0])
+            if not data:
+                return
+            query = dns.message.from_wire(data)
+            if query.question and query.question[0].rdtype == dns.rdatatype.AXFR:
+                if dns_server.allow_axfr:
+                    responses = list(dns_server.transfer(query))
+                else:
+                    responses = [dns.message.make_response(query)]
+                    responses[0].set_rcode(dns.rcode.REFUSED)
+            else:
+                responses = [dns_server.answer(query)]
+            for response in responses:
+                wire = response.to_wire()
+                self.request.sendall(struct.pack('!H', len(wire)) + wire)
+
+    def _read(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+class Listeners:
+    """
+    `count` TCP sockets listening on random localhost ports. Connections complete in the kernel backlog
+    and are never accepted, which is all a connect scan needs.
+    """
+    def __init__(self, count):
+        self.sockets = []
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(('127.0.0.1', 0))
+            sock.listen(64)
+            self.sockets.append(sock)
+        self.ports = sorted(sock.getsockname()[1] for sock in self.sockets)
+
+    def close(self):
+        for sock in self.sockets:
+            sock.close()
+
+def serve_in_thread(server):
+    """
+    Starts `server.serve_forever()` on a daemon thread and returns the server.
+    """
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,68 @@
+# benchmarks/startup.py
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+# Scan-module dependencies that must not be imported just to parse the command line
+HEAVY_MODULES = ('requests', 'bs4', 'lxml', 'nmap', 'dns', 'sqlite3', 'asyncio', 'multiprocessing')
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def measure(argv):
+    """
+    Runs `python -X importtime main.py <argv>` once. Returns (total import time of main.py in ms, imported module names).
+    Imports done by the interpreter itself (site, encodings) are not counted.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', MAIN] + argv, capture_output=True, text=True)
+    total_us = 0
+    modules = []
+    after_site = False
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        modules.append(name)
+        if indent == ' ' and after_site:
+            total_us += cumulative
+        if indent == ' ' and name == 'site':
+            after_site = True
+    return total_us / 1000, modules
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fails (exit 1) if `main.py --help` imports more than its budget allows."
+    )
+    parser.add_argument("--budget-ms", help="Median import-time budget in milliseconds. Default: 120",
+                        type=float, default=120.0)
+    parser.add_argument("--runs", help="Number of runs; the median is compared to the budget. Default: 5",
+                        type=int, default=5)
+    parser.add_argument("argv", nargs='*', help="Arguments for main.py instead of --help (prefix with --).")
+    args = parser.parse_args()
+
+    argv = args.argv or ['--help']
+    timings = []
+    imported = set()
+    for _ in range(max(1, args.runs)):
+        total_ms, modules = measure(argv)
+        timings.append(total_ms)
+        imported.update(modules)
+    heavy = sorted(name for name in imported if name.split('.')[0] in HEAVY_MODULES and '.' not in name)
+    median_ms = statistics.median(timings)
+    report = {
+        'command': ['main.py'] + argv,
+        'import_ms': {'median': round(median_ms, 1), 'min': round(min(timings), 1), 'max': round(max(timings), 1)},
+        'budget_ms': args.budget_ms,
+        'heavy_imports': heavy,
+        'ok': median_ms <= args.budget_ms and not heavy,
+    }
+    print(json.dumps(report, indent=4))
+    sys.exit(0 if report['ok'] else 1)
+
+if __name__ == "__main__":
+    main()
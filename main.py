@@ -1,18 +1,190 @@
 # main.py
 
 import argparse
+import importlib
+import os
 import sys
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 
-# Import your modules
-from modules import defaultscan, portscan, webscan, dnsenum
-from utils import output_formatter
+from utils import output_formatter, profiler
+from utils.targets import load_targets, per_target_path
 
 # Initialize Rich Console for pretty output
 console = Console()
 
+# Scan modules are imported on first use, so a run only pays for its own dependencies (nmap, requests, bs4, dnspython)
+MODULES = {
+    "defaultscan": "modules.defaultscan",
+    "portscan": "modules.portscan",
+    "webscan": "modules.webscan",
+    "dnsenum": "modules.dnsenum",
+    "coordinator": "modules.distributed",
+    "worker": "modules.distributed",
+}
+
+def comma_list(value):
+    """
+    argparse type for comma-separated options, e.g. --extensions php,bak,txt.
+    """
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def webscan_mutations(args):
+    """
+    Collects the webscan candidate expansion options, or None if none were given.
+    """
+    mutations = {
+        'extensions': args.extensions or [],
+        'cases': args.case or [],
+        'suffixes': args.suffixes or [],
+        'backups': args.backups or [],
+    }
+    return mutations if any(mutations.values()) else None
+
+def load_module(name):
+    """
+    Imports and returns the scan module registered under `name`.
+    """
+    return importlib.import_module(MODULES[name])
+
+def run_module(args, target, output_file, resume_file):
+    """
+    Runs the selected module against a single target and returns its results.
+    """
+    cache = None
+    if args.module in ("webscan", "dnsenum"):
+        from utils.cache import ResultCache, cache_enabled
+        if cache_enabled(args.cache, args.no_cache, args.refresh):
+            cache = ResultCache(refresh=args.refresh, default_ttl=args.cache_ttl)
+    try:
+        with profiler.span(args.module or "defaultscan", target=target):
+            return dispatch_module(args, target, output_file, resume_file, cache)
+    finally:
+        if cache:
+            console.print(f"[dim]Cache: {cache.hits} hits, {cache.misses} misses ({cache.path})[/dim]")
+            cache.close()
+
+def dispatch_module(args, target, output_file, resume_file, cache):
+    """
+    Calls the selected module's run_scan with its CLI options.
+    """
+    # If no module is specified, or if explicitly called as 'defaultscan', run defaultscan
+    if args.module is None or args.module == "defaultscan":
+        console.print(f"\n[bold yellow]Running Default Scan Mode...[/bold yellow]")
+        return load_module("defaultscan").run_scan(target, args.budget)
+    elif args.module == "portscan":
+        console.print(f"\n[bold yellow]Running Port Scan Module...[/bold yellow]")
+        return load_module("portscan").run_scan(target, args.ports, args.full, args.udp, args.verbose, output_file, console,
+                                 not args.no_prescan, args.concurrency, args.timeout, args.nmap_workers)
+    elif args.module == "webscan":
+        console.print(f"\n[bold yellow]Running Web Scan Module...[/bold yellow]")
+        return load_module("webscan").run_scan(target, args.url, args.dir_brute, args.wordlist, args.verbose, output_file, console, args.concurrency, resume_file, args.legacy_json, cache,
+                                not args.no_calibrate, args.max_depth if args.recursive else 0, args.max_requests,
+                                not args.no_adaptive, webscan_mutations(args), args.engine, args.crawl, args.crawl_depth, args.max_pages)
+    elif args.module == "dnsenum":
+        console.print(f"\n[bold yellow]Running DNS Enumeration Module...[/bold yellow]")
+        return load_module("dnsenum").run_scan(target, args.sub_brute, args.sub_wordlist, args.dns_server, args.verbose, output_file, console, args.concurrency, resume_file, args.legacy_json, cache,
+                                not args.no_adaptive)
+    elif args.module == "coordinator":
+        console.print(f"\n[bold yellow]Running Distributed {args.job} Coordinator...[/bold yellow]")
+        return load_module("coordinator").run_coordinator(target, args.job, args.wordlist, args.listen, args.verbose, output_file, console,
+                                args.url, args.dns_server, args.concurrency, args.lease_size, args.lease_timeout, args.engine,
+                                not args.no_calibrate, not args.no_adaptive, args.extensions, args.legacy_json, args.token)
+    raise ValueError(f"Unknown module: {args.module}")
+
+def profiling_enabled(args):
+    return args.profile or bool(args.profile_trace)
+
+def create_limiter(rate):
+    """
+    Returns a GlobalRateLimiter for --rate, or None. utils.ratelimit (asyncio, multiprocessing) is only imported when needed.
+    """
+    if not rate:
+        return None
+    from utils import ratelimit
+    return ratelimit.GlobalRateLimiter(rate)
+
+def install_limiter(limiter):
+    if limiter is not None:
+        from utils import ratelimit
+        ratelimit.install(limiter)
+
+def init_worker(limiter):
+    """
+    Process pool initializer: installs the shared limiter. Each worker imports the scan module on its first target.
+    """
+    install_limiter(limiter)
+
+def scan_worker(args, target):
+    """
+    Runs one target inside a pool worker. Per-target output/resume files are used when requested.
+    With profiling on, the worker's profile for this target is returned so the parent can merge it.
+    """
+    output_file = per_target_path(args.output, target) if args.output and args.split_output else None
+    resume_file = per_target_path(args.resume, target) if getattr(args, 'resume', None) else None
+    console.quiet = args.quiet
+    profiling = profiling_enabled(args)
+    profiler.install(profiler.Profiler() if profiling else None)
+    try:
+        results, error = run_module(args, target, output_file, resume_file), None
+    except Exception as e:
+        results, error = None, str(e)
+    return target, results, error, profiler.current().snapshot() if profiling else None
+
+def run_targets(args, targets, limiter):
+    """
+    Fans `targets` out over a process pool of `args.workers` workers and merges their results.
+    A target streamed to its own .jsonl file (--split-output) is merged as its top-level fields and 'streamed'
+    summary; its records stay in that file.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    merged = {}
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(limiter,)) as executor:
+        futures = [executor.submit(scan_worker, args, target) for target in targets]
+        for done, future in enumerate(as_completed(futures), start=1):
+            target, results, error, profile = future.result()
+            if profile:
+                profiler.current().merge(profile)
+            if error:
+                console.print(f"[bold red]\\[{done}/{len(targets)}] {target}: {error}[/bold red]")
+                merged[target] = {'error': error}
+            else:
+                console.print(f"[green]\\[{done}/{len(targets)}] {target} complete.[/green]")
+                merged[target] = results
+    if args.output and not args.split_output:
+        output_formatter.save_results(args.output, {'targets': merged}, console)
+    return merged
+
+def report_profile(args):
+    """
+    Prints the collected profile and writes the Chrome trace if one was requested.
+    """
+    collected = profiler.current()
+    collected.print_summary(console)
+    if args.profile_trace:
+        try:
+            collected.write_trace(args.profile_trace)
+            console.print(f"[green]Profile trace written to {args.profile_trace}.[/green]")
+        except OSError as e:
+            console.print(f"[bold red]Error writing profile trace to {args.profile_trace}: {e}[/bold red]")
+
+def run_worker(args):
+    """
+    Runs `worker`: joins the coordinator given by --connect and exits once its job is done.
+    """
+    install_limiter(create_limiter(args.rate))
+    if profiling_enabled(args):
+        profiler.install(profiler.Profiler())
+    try:
+        load_module("worker").run_worker(args.connect, args.name, args.concurrency, args.verbose, console, args.token)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Worker error: {e}[/bold red]")
+        sys.exit(1)
+    finally:
+        if profiling_enabled(args):
+            report_profile(args)
+
 def main():
     """
     Main function to parse arguments and orchestrate the reconnaissance tool.
@@ -25,19 +197,85 @@ def main():
     # --- Global Arguments ---
     parser.add_argument(
         "-t", "--target",
-        help="Target IP address or hostname (e.g., 192.168.1.1, example.com)",
-        required=True
+        help="Target IP address, hostname or CIDR range; comma-separate for several (e.g., 192.168.1.1, example.com, 10.0.0.0/24)"
+    )
+    parser.add_argument(
+        "-iL", "--input-list",
+        help="File with one target (IP, hostname or CIDR range) per line.",
+        type=str
+    )
+    parser.add_argument(
+        "--workers",
+        help="Number of worker processes when scanning several targets. Default: 4",
+        type=int,
+        default=4
+    )
+    parser.add_argument(
+        "--rate",
+        help="Global request rate limit (requests/sec) shared by all workers. Default: unlimited",
+        type=float
+    )
+    parser.add_argument(
+        "--no-adaptive",
+        action="store_true",
+        help="Disable adaptive (AIMD) rate control for webscan and dnsenum brute-forcing."
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Cache DNS answers and brute-force responses in ~/.cache/reconor (also enabled by RECONOR_CACHE=1)."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the result cache even if RECONOR_CACHE=1 is set."
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached entries and overwrite them with fresh results (implies --cache)."
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        help="Lifetime in seconds of cached HTTP responses. DNS answers use their record TTL. Default: 3600",
+        type=int,
+        default=3600
+    )
+    parser.add_argument(
+        "--split-output",
+        action="store_true",
+        help="With several targets, write one output file per target instead of a merged report."
     )
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="Increase output verbosity."
     )
+    parser.add_argument(
+        "-q", "--quiet",
+        action="store_true",
+        help="Machine mode: no rich output at all; brute-force findings are printed to stdout as JSON lines."
+    )
     parser.add_argument(
         "-o", "--output",
-        help="Output results to a file (e.g., results.json, results.txt).",
+        help="Output results to a file (e.g., results.json, results.txt). Use .jsonl or .jsonl.gz to stream findings as they are found.",
         type=str
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print where the time went: per-phase timings, request latency per host/server, counters and errors."
+    )
+    parser.add_argument(
+        "--profile-trace",
+        help="Also write the profile as a Chrome trace JSON file (implies --profile; open in chrome://tracing or Perfetto).",
+        metavar="FILE"
+    )
+    parser.add_argument(
+        "--legacy-json",
+        action="store_true",
+        help="With .jsonl/.jsonl.gz output, also rebuild the single indented .json file from the stream at the end."
+    )
 
     # --- Module-Specific Arguments (using subparsers for better organization) ---
     subparsers = parser.add_subparsers(
@@ -51,6 +289,12 @@ def main():
         "defaultscan",
         help="Run the default reconnaissance scan (recommended for quick overview)."
     )
+    defaultscan_parser.add_argument(
+        "--budget",
+        help="Total threads/sockets shared by concurrently running tools. Default: 64",
+        type=int,
+        default=64
+    )
     # Port Scan Module
     portscan_parser = subparsers.add_parser(
         "portscan",
@@ -71,6 +315,29 @@ def main():
         action="store_true",
         help="Include UDP port scanning (requires root/sudo for Nmap)."
     )
+    portscan_parser.add_argument(
+        "--no-prescan",
+        action="store_true",
+        help="Skip the fast TCP connect pre-scan and let Nmap probe every requested port."
+    )
+    portscan_parser.add_argument(
+        "--concurrency",
+        help="Number of simultaneous sockets for the TCP connect pre-scan. Default: 500",
+        type=int,
+        default=500
+    )
+    portscan_parser.add_argument(
+        "--timeout",
+        help="Connect timeout in seconds for the TCP connect pre-scan. Default: 1.0",
+        type=float,
+        default=1.0
+    )
+    portscan_parser.add_argument(
+        "--nmap-workers",
+        help="Number of nmap processes run in parallel, each scanning one shard of the ports/hosts. Default: 4",
+        type=int,
+        default=4
+    )
 
     # Web Scan Module
     webscan_parser = subparsers.add_parser(
@@ -92,6 +359,83 @@ def main():
         help="Path to a custom wordlist for directory brute-forcing. Default: wordlists/common.txt",
         default="wordlists/common.txt"
     )
+    webscan_parser.add_argument(
+        "--concurrency",
+        help="Number of concurrent requests for directory brute-forcing. Default: 20",
+        type=int,
+        default=20
+    )
+    webscan_parser.add_argument(
+        "--engine",
+        help="HTTP client for brute-forcing: requests, or fast (pipelined raw HTTP/1.1, far less CPU per request). Default: requests",
+        choices=["requests", "fast"],
+        default="requests"
+    )
+    webscan_parser.add_argument(
+        "--crawl",
+        action="store_true",
+        help="Crawl the site from the URL: follow same-origin links and report pages, forms, script sources and comments."
+    )
+    webscan_parser.add_argument(
+        "--crawl-depth",
+        help="Maximum number of links followed away from the start URL for --crawl. Default: 3",
+        type=int,
+        default=3
+    )
+    webscan_parser.add_argument(
+        "--max-pages",
+        help="Maximum number of pages fetched by --crawl. Default: 200",
+        type=int,
+        default=200
+    )
+    webscan_parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Brute-force discovered directories as well (see --max-depth)."
+    )
+    webscan_parser.add_argument(
+        "--max-depth",
+        help="Maximum directory depth below the start URL for --recursive. Default: 3",
+        type=int,
+        default=3
+    )
+    webscan_parser.add_argument(
+        "--max-requests",
+        help="Hard cap on the number of brute-force requests for the whole run. Default: unlimited",
+        type=int
+    )
+    webscan_parser.add_argument(
+        "-x", "--extensions",
+        help="Also try every entry with these extensions (e.g., php,bak,txt).",
+        type=comma_list
+    )
+    webscan_parser.add_argument(
+        "--case",
+        help="Also try case variants of every entry: any of lower,upper,capitalize.",
+        type=comma_list
+    )
+    webscan_parser.add_argument(
+        "--suffixes",
+        help="Also try every entry with these suffixes before the extension (e.g., 1,2,_old).",
+        type=comma_list
+    )
+    webscan_parser.add_argument(
+        "--backups",
+        help="Also try backup copies of every candidate. Default patterns: ~,.bak,.old",
+        nargs="?",
+        const="~,.bak,.old",
+        type=comma_list
+    )
+    webscan_parser.add_argument(
+        "--no-calibrate",
+        action="store_true",
+        help="Skip soft-404 calibration and keep every non-404 response."
+    )
+    webscan_parser.add_argument(
+        "--resume",
+        help="State file for checkpointing directory brute-forcing. An existing file resumes the interrupted run.",
+        type=str
+    )
 
     # DNS Enumeration Module
     dnsenum_parser = subparsers.add_parser(
@@ -110,42 +454,162 @@ def main():
     )
     dnsenum_parser.add_argument(
         "--dns-server",
-        help="Specify a custom DNS server to use (e.g., 8.8.8.8).",
+        help="Specify a custom DNS server to use (e.g., 8.8.8.8 or 127.0.0.1:5353). Repeat or comma-separate to spread queries over several servers.",
+        action="append",
+        type=str
+    )
+    dnsenum_parser.add_argument(
+        "--concurrency",
+        help="Maximum number of in-flight DNS queries for subdomain brute-forcing. Default: 100",
+        type=int,
+        default=100
+    )
+    dnsenum_parser.add_argument(
+        "--resume",
+        help="State file for checkpointing subdomain brute-forcing. An existing file resumes the interrupted run.",
+        type=str
+    )
+
+    # Distributed brute-forcing
+    coordinator_parser = subparsers.add_parser(
+        "coordinator",
+        help="Serve one webscan/dnsenum brute-force job to 'worker' processes on other nodes and merge their findings."
+    )
+    coordinator_parser.add_argument(
+        "job",
+        help="Brute-force to distribute: webscan (directories) or dnsenum (subdomains).",
+        choices=["webscan", "dnsenum"]
+    )
+    coordinator_parser.add_argument(
+        "--listen",
+        help="Address to accept workers on; use e.g. 0.0.0.0:7000 (with --token) to reach other nodes. Default: 127.0.0.1:7000",
+        default="127.0.0.1:7000"
+    )
+    coordinator_parser.add_argument(
+        "--token",
+        help="Shared secret workers must present to join. Default: $RECONOR_TOKEN",
+        default=os.environ.get("RECONOR_TOKEN")
+    )
+    coordinator_parser.add_argument(
+        "--wordlist",
+        help="Wordlist to split between the workers. Default: the bundled wordlists/common.txt"
+    )
+    coordinator_parser.add_argument(
+        "--lease-size",
+        help="Number of wordlist entries handed to a worker at a time. Default: 1000",
+        type=int,
+        default=1000
+    )
+    coordinator_parser.add_argument(
+        "--lease-timeout",
+        help="Seconds a worker may stay silent before its lease is given to another worker. Default: 30",
+        type=float,
+        default=30.0
+    )
+    coordinator_parser.add_argument(
+        "--concurrency",
+        help="Concurrency of each worker (workers may override it). Default: the module's default",
+        type=int
+    )
+    coordinator_parser.add_argument(
+        "-u", "--url",
+        help="webscan: base URL to brute-force. Default: http://<target>",
+        type=str
+    )
+    coordinator_parser.add_argument(
+        "--engine",
+        help="webscan: HTTP client the workers use, requests or fast. Default: requests",
+        choices=["requests", "fast"],
+        default="requests"
+    )
+    coordinator_parser.add_argument(
+        "-x", "--extensions",
+        help="webscan: also try every entry with these extensions (e.g., php,bak,txt).",
+        type=comma_list
+    )
+    coordinator_parser.add_argument(
+        "--no-calibrate",
+        action="store_true",
+        help="webscan: skip soft-404 calibration on the workers."
+    )
+    coordinator_parser.add_argument(
+        "--dns-server",
+        help="dnsenum: DNS server(s) the workers query (default: each worker's own resolvers). Repeat or comma-separate for several.",
+        action="append",
         type=str
     )
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Join a coordinator and work through its job (no target needed)."
+    )
+    worker_parser.add_argument(
+        "--connect",
+        help="Coordinator address (e.g., 10.0.0.5:7000).",
+        required=True
+    )
+    worker_parser.add_argument(
+        "--token",
+        help="Shared secret the coordinator was started with. Default: $RECONOR_TOKEN",
+        default=os.environ.get("RECONOR_TOKEN")
+    )
+    worker_parser.add_argument(
+        "--name",
+        help="Worker name shown by the coordinator. Default: <hostname>-<pid>"
+    )
+    worker_parser.add_argument(
+        "--concurrency",
+        help="Override the job's concurrency on this worker.",
+        type=int
+    )
 
     args = parser.parse_args()
+    console.quiet = args.quiet
+    if args.module == "worker":
+        run_worker(args)
+        return
+    if not args.target and not args.input_list:
+        parser.error("a target is required: use -t/--target and/or -iL/--input-list")
+    try:
+        targets = load_targets(args.target, args.input_list)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not targets:
+        parser.error("no targets to scan")
+    if args.module == "coordinator" and len(targets) > 1:
+        parser.error("the coordinator serves one target at a time")
+    if args.module == "webscan" and args.case:
+        unknown = [rule for rule in args.case if rule not in ("lower", "upper", "capitalize")]
+        if unknown:
+            parser.error(f"unknown --case rule(s): {', '.join(unknown)} (choose from lower, upper, capitalize)")
+    target_label = targets[0] if len(targets) == 1 else f"{len(targets)} targets"
 
-    console.print(Panel(Text(f"Starting Reconnaissance on [bold green]{args.target}[/bold green]", justify="center", style=""), style="bold blue"))
+    console.print(Panel(Text(f"Starting Reconnaissance on [bold green]{target_label}[/bold green]", justify="center", style=""), style="bold blue"))
     if args.verbose:
         console.print(f"[dim]Verbose mode enabled.[/dim]")
 
+    limiter = create_limiter(args.rate)
+    if profiling_enabled(args):
+        profiler.install(profiler.Profiler())
+
     # --- Call the appropriate module based on user selection ---
     try:
-        # If no module is specified, or if explicitly called as 'defaultscan', run defaultscan
-        if args.module is None or args.module == "defaultscan":
-            console.print(f"\n[bold yellow]Running Default Scan Mode...[/bold yellow]")
-            defaultscan.run_scan(args.target)
-        elif args.module == "portscan":
-            console.print(f"\n[bold yellow]Running Port Scan Module...[/bold yellow]")
-            portscan.run_scan(args.target, args.ports, args.full, args.udp, args.verbose, args.output, console)
-        elif args.module == "webscan":
-            console.print(f"\n[bold yellow]Running Web Scan Module...[/bold yellow]")
-            webscan.run_scan(args.target, args.url, args.dir_brute, args.wordlist, args.verbose, args.output, console)
-        elif args.module == "dnsenum":
-            console.print(f"\n[bold yellow]Running DNS Enumeration Module...[/bold yellow]")
-            dnsenum.run_scan(args.target, args.sub_brute, args.sub_wordlist, args.dns_server, args.verbose, args.output, console)
+        if len(targets) == 1:
+            install_limiter(limiter)
+            run_module(args, targets[0], args.output, getattr(args, 'resume', None))
         else:
-            parser.print_help()
-            sys.exit(1)
+            console.print(f"[dim]Scanning {len(targets)} targets with {args.workers} worker processes.[/dim]")
+            run_targets(args, targets, limiter)
     except Exception as e:
         console.print(f"[bold red]An error occurred during module execution: {e}[/bold red]", style="red")
         if args.verbose:
             import traceback
             console.print(traceback.format_exc(), style="red")
         sys.exit(1)
+    finally:
+        if profiling_enabled(args):
+            report_profile(args)
 
-    console.print(Panel(Text(f"Reconnaissance complete for [bold green]{args.target}[/bold green]", justify="center"), style="bold blue"))
+    console.print(Panel(Text(f"Reconnaissance complete for [bold green]{target_label}[/bold green]", justify="center"), style="bold blue"))
 
 
 if __name__ == "__main__":
@@ -1,106 +1,281 @@
+import asyncio
+import ipaddress
+import re
+import socket
 import subprocess
 import os
+import time
+import uuid
+from urllib.parse import urlparse
 from rich.console import Console
 
+from modules.webscan import matches_baseline, redirect_template
+from utils import profiler, ratelimit
+from utils.concurrency import run_bounded
+from utils.httpclient import ConnectionPool, ResponseError, build_request
+from utils.reporter import Reporter
+from utils.scheduler import Stage, run_stages
+from utils.streaming import nmap_xml_parser, stream_command
+from utils.wordlist import Wordlist
+
+DEFAULT_BUDGET = 64
+TOOL_THREADS = 20
+NMAP_COST = 8
+WEB_PORTS = (80, 443)
+# Host names no server is configured for, used to fingerprint the default virtual host
+VHOST_CALIBRATION_SAMPLES = ["{token}.{domain}", "{token}.invalid"]
+GOBUSTER_DIR_RE = re.compile(r"^(\S+)\s+\(Status:\s*(\d+)\)\s+\[Size:\s*(\d+)\](?:\s+\[-->\s*(\S+)\])?")
+
+def parse_gobuster_dir(line):
+    """
+    Parses a gobuster dir result line into a record.
+    """
+    m = GOBUSTER_DIR_RE.match(line.strip())
+    if not m:
+        return []
+    return [{'path': m.group(1), 'status_code': int(m.group(2)), 'content_length': int(m.group(3)), 'redirect': m.group(4)}]
+
 def nmap_scan(target):
     """
     Runs an nmap scan with -sC -sV options on the target.
+    Returns the list of open TCP ports, or None if the scan failed.
     """
     print(f"[*] Running Nmap scan on {target}...")
-    cmd = ["nmap", "-sC", "-sV", target]
+    cmd = ["nmap", "-sC", "-sV", "-oX", "-", target]
     console = Console()
+    open_ports = []
+
+    def on_record(record):
+        if record['state'] == 'open':
+            if record['protocol'] == 'tcp':
+                open_ports.append(record['port'])
+            console.print(
+                f"    \\[nmap] [cyan]{record['port']}/{record['protocol']}[/cyan] "
+                f"[green]{record['service']}[/green] {record['product']} {record['version']} {record['extrainfo']}"
+            )
+
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        console.print(result.stdout)
+        stream_command(cmd, nmap_xml_parser(), on_record)
+        return open_ports
     except subprocess.CalledProcessError as e:
-        console.print(f"[!] Nmap scan failed: {e}", style="bold red")
+        console.print(f"[!] Nmap scan failed: {e} {e.stderr}", style="bold red")
+        return None
 
-def dir_scan(target, wordlist_path=None):
+def dir_scan(target, wordlist_path=None, threads=TOOL_THREADS, url=None):
     """
-    Runs gobuster dir scan on the target using the specified wordlist.
+    Runs gobuster dir scan on the target (or `url`, default http://<target>) using the specified wordlist.
+    Hits are printed as gobuster reports them; returns their number.
     """
     console = Console()
     if wordlist_path is None:
         wordlist_path = os.path.join(os.path.dirname(__file__), "..", "wordlists", "directories.txt")
     console.print(f"[*] Running Gobuster directory scan on {target}...", style="bold cyan")
-    url = f"http://{target}"
+    url = url or f"http://{target}"
     cmd = [
         "gobuster", "dir",
         "-u", url,
-        "-w", wordlist_path
+        "-w", wordlist_path,
+        "-t", str(threads),
+        "-q", "--no-progress", "--no-color"
     ]
+    if url.startswith("https://"):
+        # Scan targets rarely have a certificate that verifies
+        cmd.append("-k")
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        console.print(result.stdout)
+        return stream_command(cmd, parse_gobuster_dir, lambda r: console.print(
+            f"    \\[gobuster] [green]{r['path']}[/green] (Status: {r['status_code']}) [Size: {r['content_length']}]"
+        ))
     except subprocess.CalledProcessError as e:
-        console.print(f"[!] Gobuster directory scan failed: {e}", style="bold red")
+        console.print(f"[!] Gobuster directory scan failed: {e} {e.stderr}", style="bold red")
+
+def summarize_response(response):
+    """
+    Reduces a utils.httpclient Response to the summary webscan's soft-404 baselines work on.
+    """
+    declared = response.headers.get('content-length')
+    body = response.body
+    return {
+        'status_code': response.status,
+        'content_length': int(declared) if declared and declared.isdigit() else len(body),
+        'redirect': response.headers.get('location'),
+        'words': len(body.split()),
+        'lines': body.count(b'\n') + 1 if body else 0,
+    }
+
+def host_header(name, port, tls):
+    """
+    Host header value for `name`, with the port only when it is not the scheme's default.
+    """
+    return name if port == (443 if tls else 80) else f"{name}:{port}"
+
+async def probe_vhost(pool, name, path, server_name):
+    """
+    Requests `path` with `Host: name` over the pool and returns the response summary.
+    """
+    raw = build_request('GET', path, host_header(name, pool.port, pool.ssl_context is not None))
+    started = time.monotonic()
+    try:
+        return summarize_response(await pool.request(raw, server_name))
+    finally:
+        profiler.count('vhost requests')
+        profiler.observe('vhost', f"{pool.host}:{pool.port}", time.monotonic() - started)
+
+async def calibrate_vhosts(pool, domain, path, rotate_sni):
+    """
+    Fingerprints the default virtual host: the answers for the target's own name and for a few random names
+    that cannot be configured. Returns baselines in webscan's format, one per status code seen, so
+    webscan.matches_baseline() can recognise a candidate that merely fell through to the default vhost.
+    """
+    baselines = {}
+    token = uuid.uuid4().hex[:12]
+    names = [domain] + [pattern.format(token=token, domain=domain) for pattern in VHOST_CALIBRATION_SAMPLES]
+    for name in names:
+        try:
+            summary = await probe_vhost(pool, name, path, name if rotate_sni else domain)
+        except (OSError, asyncio.TimeoutError, ResponseError) as e:
+            profiler.error(e)
+            continue
+        baseline = baselines.setdefault(summary['status_code'], {
+            'status_code': summary['status_code'], 'sizes': set(), 'words': set(), 'lines': set(), 'redirects': set()
+        })
+        baseline['sizes'].add(summary['content_length'])
+        baseline['words'].add(summary['words'])
+        baseline['lines'].add(summary['lines'])
+        baseline['redirects'].add(redirect_template(summary['redirect'], name))
+    return list(baselines.values())
+
+def fuzz_vhosts(url, names, concurrency, console, label, rotate_sni=True):
+    """
+    Virtual-host fuzzing against the single address `url` points at: every name in `names` is requested
+    with `Host: <name>` (and, over TLS with `rotate_sni`, the same SNI) through a pool of keep-alive connections,
+    so no DNS lookups happen and plain-HTTP probes share a handful of connections.
+    Responses matching the default-vhost fingerprint are dropped. Returns hits shaped like webscan's
+    'dir_brute_results' entries, plus the 'vhost' name.
+    """
+    parsed = urlparse(url)
+    tls = parsed.scheme == 'https'
+    port = parsed.port or (443 if tls else 80)
+    path = parsed.path or '/'
+    domain = parsed.hostname
+    try:
+        address = socket.getaddrinfo(domain, port, type=socket.SOCK_STREAM)[0][4][0]
+    except socket.gaierror as e:
+        console.print(f"[!] {label} failed: cannot resolve {domain}: {e}", style="bold red")
+        return None
+
+    hits = []
+    dropped = 0
+    pool = ConnectionPool(address, port, tls, size=concurrency)
+
+    async def run(reporter):
+        baselines = await calibrate_vhosts(pool, domain, path, rotate_sni)
+
+        async def probe(name):
+            nonlocal dropped
+            await ratelimit.wait_async()
+            try:
+                summary = await probe_vhost(pool, name, path, name if rotate_sni else domain)
+            except (OSError, asyncio.TimeoutError, ResponseError) as e:
+                profiler.error(e)
+                reporter.error(f"[dim]    Error probing {name}: {e!r}[/dim]")
+                return
+            if matches_baseline(summary, baselines, name):
+                dropped += 1
+                reporter.miss()
+                return
+            hit = {
+                'url': f"{parsed.scheme}://{host_header(name, port, tls)}{path}",
+                'vhost': name,
+                'status_code': summary['status_code'],
+                'content_length': summary['content_length'],
+            }
+            if summary['redirect']:
+                hit['redirect'] = summary['redirect']
+            hits.append(hit)
+            reporter.hit(f"    \\[vhost] [green]{name}[/green] (Status: {hit['status_code']}) [Size: {hit['content_length']}]",
+                         {'module': 'defaultscan', **hit})
+
+        try:
+            await run_bounded(names, probe, concurrency)
+        finally:
+            pool.close()
+
+    with Reporter(console) as reporter, profiler.span(f"defaultscan: {label}", address=f"{address}:{port}"):
+        asyncio.run(run(reporter))
+    console.print(
+        f"[dim][*] {label}: {pool.requests} probes to {address}:{port} over {pool.opened} connections, "
+        f"{dropped} default-vhost responses dropped.[/dim]"
+    )
+    return hits
 
-def vhost_scan(target, wordlist_path=None):
+def is_ip_address(value):
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+def vhost_scan(target, wordlist_path=None, threads=TOOL_THREADS, url=None):
     """
-    Runs gobuster vhost scan on the target using the specified wordlist.
+    Fuzzes virtual hosts on the target, using each wordlist entry verbatim as the Host header.
     """
     console = Console()
     if wordlist_path is None:
         wordlist_path = os.path.join(os.path.dirname(__file__), "..", "wordlists", "common.txt")
-    console.print(f"[*] Running Gobuster vhost scan on {target}...", style="bold cyan")
-    url = f"http://{target}"
-    cmd = [
-        "gobuster", "vhost",
-        "-u", url,
-        "-w", wordlist_path,
-        "-H", f"Host: {target}"
-    ]
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        console.print(result.stdout)
-    except subprocess.CalledProcessError as e:
-        console.print(f"[!] Gobuster vhost scan failed: {e}", style="bold red")
-        
-def subdomain_scan(target, wordlist_path=None):
-            """
-            Uses ffuf to scan for subdomains of the target using the specified wordlist.
-            """
-            console = Console()
-            if wordlist_path is None:
-                wordlist_path = os.path.join(os.path.dirname(__file__), "..", "wordlists", "common.txt")
-            console.print(f"[*] Running ffuf subdomain scan on {target}...", style="bold cyan")
-            url = f"http://FUZZ.{target}"
-            cmd = [
-                "ffuf",
-                "-w", wordlist_path,
-                "-u", url,
-                "-H", f"Host: {target}"
-            ]
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                console.print(result.stdout)
-            except subprocess.CalledProcessError as e:
-                console.print(f"[!] ffuf subdomain scan failed: {e}", style="bold red")
-            """
-            Uses ffuf to scan for subdomains of the target using the specified wordlist.
-            """
-            console = Console()
-            if wordlist_path is None:
-                wordlist_path = os.path.join(os.path.dirname(__file__), "..", "wordlists", "common.txt")
-            console.print(f"[*] Running ffuf subdomain scan on {target}...", style="bold cyan")
-            url = f"http://FUZZ.{target}"
-            cmd = [
-                "ffuf",
-                "-w", wordlist_path,
-                "-u", url,
-                "-H", f"Host: {target}"
-            ]
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                console.print(result.stdout)
-            except subprocess.CalledProcessError as e:
-                console.print(f"[!] ffuf subdomain scan failed: {e}", style="bold red")
+    console.print(f"[*] Running vhost scan on {target}...", style="bold cyan")
+    return fuzz_vhosts(url or f"http://{target}", Wordlist(wordlist_path), threads, console, "vhost scan")
 
-def run_scan(target):
-    vhost_scan(target)
-    dir_scan(target)
-    nmap_scan(target)
-    subdomain_scan(target)
+def subdomain_scan(target, wordlist_path=None, threads=TOOL_THREADS, url=None):
+    """
+    Fuzzes <entry>.<target> virtual hosts on the target's web server, using the specified wordlist.
+    """
+    console = Console()
+    if wordlist_path is None:
+        wordlist_path = os.path.join(os.path.dirname(__file__), "..", "wordlists", "common.txt")
+    if is_ip_address(target):
+        console.print(f"[dim][-] Skipping subdomain scan: {target} is an IP address, not a domain.[/dim]")
+        return []
+    console.print(f"[*] Running subdomain vhost scan on {target}...", style="bold cyan")
+    names = (f"{entry}.{target}" for entry in Wordlist(wordlist_path))
+    return fuzz_vhosts(url or f"http://{target}", names, threads, console, "subdomain scan")
+
+def has_web_ports(results):
+    """
+    Stage condition: only run web stages if nmap reported an open HTTP/S port.
+    """
+    return bool(set(results.get('nmap') or []) & set(WEB_PORTS))
+
+def web_url(target, open_ports):
+    """
+    Base URL for the web stages: https://<target> if nmap found 443 open but not 80, else http://<target>.
+    """
+    scheme = 'https' if 443 in open_ports and 80 not in open_ports else 'http'
+    return f"{scheme}://{target}"
+
+def run_scan(target, budget=DEFAULT_BUDGET):
+    """
+    Runs nmap first, then the vhost, gobuster dir and subdomain web stages concurrently if a web port is open.
+    Stages share a global thread/socket `budget`: each web stage's threads (and its cost) are its share of the budget
+    left after nmap. The web stages probe https:// instead of http:// when only 443 is open.
+    Per-stage timings are printed at the end.
+    """
+    console = Console()
+    web_stages = [('vhost', vhost_scan), ('dir', dir_scan), ('subdomain', subdomain_scan)]
+    # Each web stage gets an equal share of what nmap leaves free, and runs with exactly that many threads
+    threads = max(1, (budget - NMAP_COST) // len(web_stages))
+    # Filled in by the nmap stage, which every web stage waits for
+    open_ports = []
+
+    def nmap_stage():
+        ports = nmap_scan(target)
+        open_ports.extend(ports or [])
+        return ports
+
+    stages = [Stage('nmap', nmap_stage, cost=NMAP_COST)]
+    for name, scan in web_stages:
+        stages.append(Stage(name, lambda scan=scan: scan(target, threads=threads, url=web_url(target, open_ports)),
+                            deps=['nmap'], condition=has_web_ports, cost=threads))
+    return run_stages(stages, budget, console)
 
 
 if __name__ == "__main__":
@@ -108,4 +283,4 @@ if __name__ == "__main__":
     target = "example.com"  # Replace with your target
     nmap_scan(target)
     dir_scan(target)
-    vhost_scan(target)
\ No newline at end of file
+    vhost_scan(target)
@@ -0,0 +1,469 @@
+# modules/distributed.py
+
+import asyncio
+import hmac
+import importlib
+import ipaddress
+import itertools
+import json
+import os
+import socket
+from collections import deque
+from urllib.parse import urljoin
+from rich.progress import SpinnerColumn, TextColumn
+
+from utils import output_formatter, profiler, ratelimit
+from utils.wordlist import Wordlist, Expansion, CompactHashSet
+from utils.reporter import Reporter, make_progress
+
+DEFAULT_LISTEN = "127.0.0.1:7000"
+# Used for both jobs, as defaultscan does for its subdomain scan
+DEFAULT_WORDLIST = os.path.join(os.path.dirname(__file__), "..", "wordlists", "common.txt")
+DEFAULT_LEASE_SIZE = 1000
+LEASE_TIMEOUT = 30.0
+MAX_LEASE_ATTEMPTS = 3
+HEARTBEAT_INTERVAL = 5.0
+WAIT_INTERVAL = 1.0
+CONNECT_ATTEMPTS = 30
+# Longest protocol line accepted; a lease is one line holding all of its entries
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+JOB_SECTIONS = {'webscan': 'dir_brute_results', 'dnsenum': 'subdomains'}
+
+def parse_address(value, default_host="127.0.0.1"):
+    """
+    Splits 'host:port', ':port' or 'port' into (host, port).
+    """
+    host, sep, port = value.rpartition(':')
+    if not sep:
+        host, port = '', value
+    if not port.isdigit():
+        raise ValueError(f"Invalid address {value!r}, expected host:port")
+    return host.strip('[]') or default_host, int(port)
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == 'localhost'
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+async def send(writer, message):
+    writer.write(encode(message))
+    await writer.drain()
+
+async def receive(reader):
+    """
+    Reads one message, or returns None once the peer has closed the connection.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+class Coordinator:
+    """
+    Splits `entries` into leases of `lease_size` and hands them to workers, one at a time per worker, over a
+    line-delimited JSON protocol:
+
+        worker -> {"type": "hello", "worker": name, "token": t}    coordinator -> {"type": "job", ...}
+                                                                           or {"type": "error", "message": ...}
+        worker -> {"type": "request"}                       coordinator -> {"type": "lease", "id": n, "entries": [...]}
+                                                                           {"type": "wait", "seconds": s} or {"type": "done"}
+        worker -> {"type": "hit", "lease": n, "result": {...}}   (streamed while the lease runs)
+        worker -> {"type": "complete", "lease": n, "throttled": [...]}   (entries still rate-limited after retries)
+        worker -> {"type": "heartbeat"}
+
+    A worker that disconnects or stays silent for `lease_timeout` seconds is dropped and its lease goes back to the
+    queue for the next worker that asks; a lease lost MAX_LEASE_ATTEMPTS times is given up. Hits are deduplicated
+    (a reassigned lease may report some of them twice) and emitted to `sink` under the job's section.
+    Leases are cut lazily from the wordlist iterator, so only the outstanding ones are held in memory.
+    With a `token`, a worker whose hello does not carry the same one is turned away before it sees the job.
+    """
+    def __init__(self, job, entries, lease_size, lease_timeout, sink, reporter, console, on_progress=None, token=None):
+        self.job = job
+        self.token = token
+        self.section = JOB_SECTIONS[job['module']]
+        self.lease_size = lease_size
+        self.lease_timeout = lease_timeout
+        self.sink = sink
+        self.reporter = reporter
+        self.console = console
+        self.on_progress = on_progress
+        self.leases = {}
+        self.issued = 0
+        self.reassigned = 0
+        self.abandoned = 0
+        self.workers_seen = 0
+        self.throttled = []
+        self._entries = iter(entries)
+        self._exhausted = False
+        self._requeued = deque()
+        self._lease_ids = itertools.count(1)
+        self._seen = CompactHashSet()
+        self._writers = set()
+        self.finished = asyncio.Event()
+
+    def _assign(self, worker):
+        """
+        The next lease for `worker`: a requeued one first, else a fresh slice of the wordlist. None if nothing is left.
+        """
+        if self._requeued:
+            lease_id = self._requeued.popleft()
+            self.reassigned += 1
+        elif not self._exhausted:
+            entries = list(itertools.islice(self._entries, self.lease_size))
+            if len(entries) < self.lease_size:
+                self._exhausted = True
+            if not entries:
+                self._check_finished()
+                return None
+            lease_id = next(self._lease_ids)
+            self.leases[lease_id] = {'entries': entries, 'worker': None, 'attempts': 0}
+            self.issued += 1
+        else:
+            return None
+        lease = self.leases[lease_id]
+        lease['worker'] = worker
+        lease['attempts'] += 1
+        return lease_id
+
+    def _release(self, worker):
+        """
+        Puts the lease held by a lost `worker` back in the queue.
+        """
+        for lease_id, lease in list(self.leases.items()):
+            if lease['worker'] != worker:
+                continue
+            lease['worker'] = None
+            if lease['attempts'] >= MAX_LEASE_ATTEMPTS:
+                del self.leases[lease_id]
+                self.abandoned += len(lease['entries'])
+                self.console.print(f"[bold red]Lease {lease_id} lost {lease['attempts']} times, giving up on its {len(lease['entries'])} entries.[/bold red]")
+                if self.on_progress:
+                    self.on_progress(len(lease['entries']))
+                self._check_finished()
+            else:
+                self._requeued.append(lease_id)
+                self.console.print(f"[yellow]Lease {lease_id} from {worker} requeued.[/yellow]")
+
+    def _complete(self, worker, lease_id, throttled=()):
+        lease = self.leases.get(lease_id)
+        if lease is None or lease['worker'] != worker:
+            return
+        del self.leases[lease_id]
+        self.throttled.extend(throttled)
+        if self.on_progress:
+            self.on_progress(len(lease['entries']))
+        self._check_finished()
+
+    def _check_finished(self):
+        if self._exhausted and not self.leases and not self.finished.is_set():
+            self.finished.set()
+            # Workers idling between 'wait' polls are told right away
+            for writer in self._writers:
+                writer.write(encode({'type': 'done'}))
+
+    async def drain(self, timeout=WAIT_INTERVAL * 2):
+        """
+        Once finished, gives connected workers `timeout` seconds to read 'done' and hang up, then closes the rest.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._writers and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        for writer in list(self._writers):
+            writer.close()
+        while self._writers and loop.time() < deadline + timeout:
+            await asyncio.sleep(0.05)
+
+    def _merge(self, result):
+        if not self._seen.add(json.dumps(result, sort_keys=True)):
+            return
+        profiler.count('distributed hits')
+        if self.section == 'dir_brute_results':
+            markup = f"    [green]Found {result['url']} (Status: {result['status_code']})[/green]"
+        else:
+            markup = f"    [green]Found {result['subdomain']} -> {result['ip']}[/green]"
+        self.reporter.hit(markup, {'module': self.job['module'], **result})
+        self.sink.emit(self.section, result)
+
+    async def handle(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        worker = f"{peer[0]}:{peer[1]}" if peer else "worker"
+        try:
+            hello = await asyncio.wait_for(receive(reader), self.lease_timeout)
+            if not hello or hello.get('type') != 'hello':
+                return
+            worker = f"{hello.get('worker') or 'worker'}@{worker}"
+            if self.token and not hmac.compare_digest(str(hello.get('token') or '').encode(), self.token.encode()):
+                self.console.print(f"[yellow]Worker {worker} sent a wrong token, turning it away.[/yellow]")
+                await send(writer, {'type': 'error', 'message': "wrong or missing token"})
+                return
+            self.workers_seen += 1
+            self.console.print(f"[cyan]Worker {worker} joined.[/cyan]")
+            await send(writer, {'type': 'job', **self.job})
+            self._writers.add(writer)
+            while True:
+                message = await asyncio.wait_for(receive(reader), self.lease_timeout)
+                if message is None:
+                    break
+                kind = message.get('type')
+                if kind == 'hit':
+                    self._merge(message['result'])
+                elif kind == 'complete':
+                    self._complete(worker, message['lease'], message.get('throttled') or ())
+                elif kind == 'request':
+                    lease_id = None if self.finished.is_set() else self._assign(worker)
+                    if lease_id is not None:
+                        await send(writer, {'type': 'lease', 'id': lease_id, 'entries': self.leases[lease_id]['entries']})
+                    elif self.finished.is_set():
+                        await send(writer, {'type': 'done'})
+                        break
+                    else:
+                        # Everything is leased out; ask again in case a lease comes back
+                        await send(writer, {'type': 'wait', 'seconds': WAIT_INTERVAL})
+        except asyncio.TimeoutError:
+            self.console.print(f"[yellow]Worker {worker} silent for {self.lease_timeout:.0f}s, dropping it.[/yellow]")
+        except (ConnectionError, ValueError, KeyError) as e:
+            profiler.error(e)
+            self.console.print(f"[yellow]Worker {worker} failed: {e}[/yellow]")
+        finally:
+            self._writers.discard(writer)
+            self._release(worker)
+            writer.close()
+            if not self.finished.is_set():
+                self.console.print(f"[dim]Worker {worker} left.[/dim]")
+
+def job_entries(job_module, wordlist_path, extensions=None):
+    """
+    The wordlist a job leases out: webscan entries are expanded with `extensions` first, so leases hold final candidates.
+    """
+    wordlist = Wordlist(wordlist_path)
+    if job_module == 'webscan' and extensions:
+        return Expansion(wordlist, extensions=extensions)
+    return wordlist
+
+def run_coordinator(target, job_module, wordlist_path, listen, verbose, output_file, console, url=None, dns_server=None,
+                    concurrency=None, lease_size=DEFAULT_LEASE_SIZE, lease_timeout=LEASE_TIMEOUT, engine='requests',
+                    auto_calibrate=True, adaptive=True, extensions=None, legacy_json=False, token=None):
+    """
+    Runs a webscan directory or dnsenum subdomain brute-force against `target` as a distributed job: listens on
+    `listen` (host:port) for `reconor worker` processes, leases the wordlist out to them and merges their findings
+    into one result, saved to `output_file`. Returns the results dict.
+    `concurrency` (the module's default if None) is what each worker runs with unless it overrides it.
+    `wordlist_path` defaults to the bundled common.txt. Only workers presenting `token` are let in, if one is set;
+    without it, listening on anything but loopback lets whoever can reach the port join and read the job.
+    """
+    wordlist_path = wordlist_path or DEFAULT_WORDLIST
+    if not os.path.exists(wordlist_path):
+        console.print(f"[bold red]Error: Wordlist not found at {wordlist_path}[/bold red]")
+        return None
+    if job_module == 'webscan':
+        url = url or f"http://{target}"
+        job = {'module': 'webscan', 'target': target, 'url': url, 'engine': engine, 'calibrate': auto_calibrate}
+        results = {'url': url}
+    else:
+        from modules.dnsenum import parse_dns_servers
+        job = {'module': 'dnsenum', 'target': target, 'nameservers': parse_dns_servers(dns_server)}
+        results = {'target': target}
+    job.update({'concurrency': concurrency, 'adaptive': adaptive, 'heartbeat': min(HEARTBEAT_INTERVAL, lease_timeout / 3)})
+
+    entries = job_entries(job_module, wordlist_path, extensions)
+    total = len(entries)
+    host, port = parse_address(listen)
+    if not token and not is_loopback(host):
+        console.print(f"[bold yellow]Warning: listening on {host} without --token; anyone who can reach port {port} "
+                      f"can join as a worker.[/bold yellow]")
+    sink = output_formatter.open_sink(output_file, console, legacy_json)
+    sink.section(JOB_SECTIONS[job_module])
+
+    async def serve(coordinator):
+        server = await asyncio.start_server(coordinator.handle, host, port, limit=MAX_MESSAGE_BYTES)
+        bound = server.sockets[0].getsockname()
+        console.print(
+            f"[bold blue]Coordinator listening on {bound[0]}:{bound[1]}: {total} entries in leases of {lease_size}.[/bold blue]\n"
+            f"[dim]Start workers with: python3 main.py worker --connect <this host>:{bound[1]}"
+            f"{' --token <token>' if token else ''}[/dim]"
+        )
+        async with server:
+            if total == 0:
+                coordinator._exhausted = True
+                coordinator._check_finished()
+            await coordinator.finished.wait()
+            await coordinator.drain()
+
+    coordinator = None
+    try:
+        with make_progress(
+            console,
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+        ) as progress, Reporter(console, verbose) as reporter:
+            task = progress.add_task(f"[cyan]Distributed {job_module} brute-force...", total=total)
+            coordinator = Coordinator(job, entries, lease_size, lease_timeout, sink, reporter, console,
+                                      lambda done: progress.update(task, advance=done), token)
+            with profiler.span('distributed: coordinator', module=job_module, entries=total):
+                asyncio.run(serve(coordinator))
+            progress.update(task, description=f"[green]Distributed {job_module} brute-force complete![/green]")
+    finally:
+        if coordinator:
+            results['distributed'] = {
+                'workers': coordinator.workers_seen,
+                'leases': coordinator.issued,
+                'reassigned': coordinator.reassigned,
+                'abandoned_entries': coordinator.abandoned,
+                'throttled_entries': len(coordinator.throttled),
+            }
+            console.print(
+                f"[dim]{coordinator.workers_seen} worker(s), {coordinator.issued} leases, "
+                f"{coordinator.reassigned} reassigned.[/dim]"
+            )
+            if coordinator.throttled:
+                from modules.webscan import report_throttled
+                report_throttled(coordinator.throttled, verbose, console)
+        results = sink.close(results)
+    return results
+
+async def webscan_lease_runner(job, concurrency, console):
+    """
+    Prepares a worker for a webscan job (soft-404 calibration from this node) and returns run(entries, on_hit).
+    Entries answered 429/503 are retried as in a local scan; run() returns the URLs that never got through.
+    """
+    from modules import webscan
+    url = job['url']
+    session = webscan.build_session(concurrency)
+    baselines = []
+    if job['calibrate']:
+        baselines = await asyncio.to_thread(webscan.calibrate, session, url)
+    rate = ratelimit.AdaptiveRate(initial=concurrency * 5) if job['adaptive'] else None
+
+    async def run(entries, on_hit):
+        throttled = {}
+
+        def on_result(entry, test_url, summary):
+            status = summary['status_code']
+            if status in webscan.BACKOFF_STATUSES:
+                throttled[entry] = None
+                return
+            if status == 404 or webscan.matches_baseline(summary, baselines, entry):
+                return
+            on_hit(webscan.dir_hit(test_url, summary))
+
+        def run_pass(batch):
+            if job['engine'] == 'fast':
+                return webscan.dir_brute_fast(url, batch, concurrency, on_result, baselines=baselines, rate=rate)
+            return webscan.dir_brute_async(session, url, batch, concurrency, on_result, baselines=baselines, rate=rate)
+
+        await webscan.retry_throttled(run_pass, entries, throttled)
+        return [urljoin(url, entry) for entry in throttled]
+
+    return run
+
+async def dnsenum_lease_runner(job, concurrency, console):
+    """
+    Prepares a worker for a dnsenum job (wildcard detection from this node) and returns run(entries, on_hit).
+    Without nameservers in the job, the worker's own resolvers are used.
+    """
+    import dns.resolver
+    from modules import dnsenum
+    target = job['target']
+    nameservers = job['nameservers'] or list(dns.resolver.Resolver().nameservers)
+    wildcard_ips = await dnsenum.detect_wildcard(target, nameservers)
+    if wildcard_ips:
+        console.print(f"[yellow]Wildcard DNS detected for *.{target} -> {', '.join(sorted(wildcard_ips))}.[/yellow]")
+    rate = ratelimit.AdaptiveRate(initial=concurrency * 5, increase=50.0) if job['adaptive'] else None
+
+    async def run(entries, on_hit):
+        def on_found(full_domain, ips):
+            for ip_address in ips:
+                on_hit({'subdomain': full_domain, 'ip': ip_address})
+
+        await dnsenum.resolve_subdomains_async(target, entries, nameservers, concurrency, on_found,
+                                               wildcard_ips=wildcard_ips, rate=rate)
+
+    return run
+
+LEASE_RUNNERS = {'webscan': webscan_lease_runner, 'dnsenum': dnsenum_lease_runner}
+
+async def connect(host, port, attempts=CONNECT_ATTEMPTS):
+    """
+    Connects to the coordinator, retrying once a second so workers can be started before it.
+    """
+    for attempt in range(attempts):
+        try:
+            return await asyncio.open_connection(host, port, limit=MAX_MESSAGE_BYTES)
+        except OSError:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(1)
+
+def run_worker(connect_to, name, concurrency, verbose, console, token=None):
+    """
+    Joins the coordinator at `connect_to` (host:port), presenting `token` if it requires one, and works through
+    leases until it says the job is done. Hits are streamed back as they are found; `concurrency` overrides the job's.
+    Returns the number of leases done.
+    """
+    host, port = parse_address(connect_to)
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+
+    async def work():
+        reader, writer = await connect(host, port)
+        heartbeat = None
+        leases = 0
+        try:
+            await send(writer, {'type': 'hello', 'worker': name, 'token': token})
+            job = await receive(reader)
+            if job and job.get('type') == 'error':
+                raise ConnectionError(f"coordinator refused us: {job.get('message')}")
+            if not job or job.get('type') != 'job':
+                raise ConnectionError("coordinator did not send a job")
+            job_concurrency = (concurrency or job['concurrency']
+                               or importlib.import_module(f"modules.{job['module']}").DEFAULT_CONCURRENCY)
+            console.print(
+                f"[blue]Worker {name} joined {host}:{port}: {job['module']} on "
+                f"{job.get('url') or job['target']} ({job_concurrency} concurrent).[/blue]"
+            )
+
+            async def beat():
+                while True:
+                    await asyncio.sleep(job['heartbeat'])
+                    writer.write(encode({'type': 'heartbeat'}))
+
+            heartbeat = asyncio.ensure_future(beat())
+            run_lease = await LEASE_RUNNERS[job['module']](job, job_concurrency, console)
+            with Reporter(console, verbose) as reporter:
+                while True:
+                    await send(writer, {'type': 'request'})
+                    message = await receive(reader)
+                    if message is None:
+                        raise ConnectionError("coordinator closed the connection")
+                    if message['type'] == 'done':
+                        break
+                    if message['type'] == 'wait':
+                        await asyncio.sleep(message.get('seconds', WAIT_INTERVAL))
+                        continue
+                    lease_id = message['id']
+
+                    def on_hit(result):
+                        reporter.hit(f"    [green]Found {result.get('url') or result.get('subdomain')}[/green]",
+                                     {'module': job['module'], **result})
+                        writer.write(encode({'type': 'hit', 'lease': lease_id, 'result': result}))
+
+                    with profiler.span('distributed: lease', lease=lease_id, entries=len(message['entries'])):
+                        throttled = await run_lease(message['entries'], on_hit)
+                    await send(writer, {'type': 'complete', 'lease': lease_id, 'throttled': throttled or []})
+                    leases += 1
+                    if verbose:
+                        console.print(f"[dim]Lease {lease_id} done ({len(message['entries'])} entries).[/dim]")
+        finally:
+            if heartbeat:
+                heartbeat.cancel()
+            writer.close()
+        return leases
+
+    leases = asyncio.run(work())
+    console.print(f"[green]Job done; worker {name} completed {leases} lease(s).[/green]")
+    return leases
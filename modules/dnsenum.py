@@ -1,24 +1,483 @@
 # modules/dnsenum.py
 
+import asyncio
+import itertools
+import time
+import uuid
+import dns.asyncresolver
+import dns.exception
+import dns.nameserver
+import dns.query
+import dns.rdatatype
 import dns.resolver
 import dns.reversename
+import dns.zone
 from rich.progress import Progress, SpinnerColumn, TextColumn
 import os
 
-def run_scan(target, sub_brute, sub_wordlist_path, dns_server, verbose, output_file, console):
+from utils import output_formatter, profiler, ratelimit
+from utils.concurrency import run_bounded
+from utils.wordlist import Wordlist, CompactHashSet
+from utils.checkpoint import Checkpoint
+from utils.cache import MISS, NEGATIVE_TTL
+from utils.reporter import Reporter, make_progress
+
+DEFAULT_CONCURRENCY = 100
+QUERY_TIMEOUT = 2.0
+QUERY_RETRIES = 2
+WILDCARD_SAMPLES = 3
+AXFR_TIMEOUT = 10.0
+RECORD_TYPES = ['A', 'AAAA', 'MX', 'NS', 'TXT', 'SOA']
+
+def parse_dns_servers(dns_server):
+    """
+    Normalises the --dns-server value(s) into a flat list of nameserver addresses.
+    Accepts None, a single string, a comma-separated string or a list of any of those.
+    Addresses may carry a port ('127.0.0.1:5353', '[::1]:5353').
+    """
+    if not dns_server:
+        return []
+    if isinstance(dns_server, str):
+        dns_server = [dns_server]
+    return [ns.strip() for value in dns_server for ns in value.split(',') if ns.strip()]
+
+def split_nameserver(ns):
+    """
+    Splits 'ip', 'ip:port' or '[ipv6]:port' into (host, port), defaulting to port 53.
+    """
+    host, port = ns, 53
+    if ns.startswith('['):
+        host, _, rest = ns[1:].partition(']')
+        if rest.startswith(':'):
+            port = int(rest[1:])
+    elif ns.count(':') == 1:
+        host, _, port = ns.partition(':')
+        port = int(port)
+    return host, port
+
+def nameserver_address(ns):
+    """
+    Turns 'ip', 'ip:port' or '[ipv6]:port' into a value dnspython accepts in Resolver.nameservers.
+    """
+    host, port = split_nameserver(ns)
+    if port == 53:
+        return host
+    return dns.nameserver.Do53Nameserver(host, port)
+
+def cached_answer(cache, target, query):
+    """
+    Looks `query` up in `cache`: returns MISS, the cached rdata strings, or re-raises a cached negative answer.
+    """
+    if not cache:
+        return MISS
+    cached = cache.get('dnsenum', target, query)
+    if cached == 'NXDOMAIN':
+        raise dns.resolver.NXDOMAIN()
+    if cached == []:
+        raise dns.resolver.NoAnswer()
+    return cached
+
+def store_answer(cache, target, query, answers=None, error=None):
+    """
+    Caches an answer for its record TTL, or a NXDOMAIN/NoAnswer `error` for NEGATIVE_TTL.
+    """
+    if not cache:
+        return
+    if isinstance(error, dns.resolver.NXDOMAIN):
+        cache.put('dnsenum', target, query, 'NXDOMAIN', NEGATIVE_TTL)
+    elif isinstance(error, dns.resolver.NoAnswer):
+        cache.put('dnsenum', target, query, [], NEGATIVE_TTL)
+    elif answers is not None:
+        cache.put('dnsenum', target, query, [str(rdata) for rdata in answers], answers.rrset.ttl)
+
+async def resolve_cached(resolver, qname, rtype, cache, target):
+    """
+    resolver.resolve() returning rdata strings, served from `cache` while the record TTL lasts.
+    """
+    query = f"{rtype} {qname}"
+    cached = cached_answer(cache, target, query)
+    if cached is not MISS:
+        return cached
+    try:
+        with profiler.span('dnsenum: record query', rtype=rtype):
+            answers = await resolver.resolve(qname, rtype)
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+        store_answer(cache, target, query, error=e)
+        raise
+    store_answer(cache, target, query, answers)
+    return [str(rdata) for rdata in answers]
+
+def build_resolver(nameservers, timeout=QUERY_TIMEOUT, retries=QUERY_RETRIES):
+    """
+    One async resolver over all `nameservers`, letting dnspython fail over between them.
+    """
+    resolver = dns.asyncresolver.Resolver(configure=False)
+    resolver.nameservers = [nameserver_address(ns) for ns in nameservers]
+    resolver.timeout = timeout
+    resolver.lifetime = timeout * (retries + 1)
+    return resolver
+
+async def query_records(resolver, target, record_types, cache, reverse_name=None):
+    """
+    Queries every record type of `target`, plus the PTR record of `reverse_name` if given, all at once.
+    Returns {rtype: rdata strings or the exception raised}; the PTR result is stored under 'PTR'.
+    """
+    queries = [(rtype, target) for rtype in record_types]
+    if reverse_name is not None:
+        queries.append(('PTR', reverse_name))
+    answers = await asyncio.gather(
+        *(resolve_cached(resolver, qname, rtype, cache, target) for rtype, qname in queries),
+        return_exceptions=True
+    )
+    return {rtype: answer for (rtype, _), answer in zip(queries, answers)}
+
+def transfer_zone(target, host, port, timeout=AXFR_TIMEOUT):
+    """
+    Attempts a zone transfer (AXFR) of `target` from host:port. Returns the records as
+    (fqdn, ttl, rdtype, rdata) tuples, or raises if the server refuses or the transfer fails.
+    """
+    zone = dns.zone.from_xfr(dns.query.xfr(host, target, port=port, lifetime=timeout, relativize=False), relativize=False)
+    return [
+        (name.to_text(omit_final_dot=True), ttl, dns.rdatatype.to_text(rdata.rdtype), rdata.to_text())
+        for name, ttl, rdata in zone.iterate_rdatas()
+    ]
+
+async def attempt_axfr(target, servers, timeout=AXFR_TIMEOUT):
+    """
+    Tries a zone transfer from every (host, port) in `servers` in parallel.
+    Returns [(server, records or None, exception or None)] in the order of `servers`.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def attempt(server):
+        host, port = server
+        try:
+            with profiler.span('dnsenum: axfr', server=f"{host}:{port}"):
+                records = await loop.run_in_executor(None, transfer_zone, target, host, port, timeout)
+            return server, records, None
+        except Exception as e:
+            profiler.error(e)
+            return server, None, e
+
+    return await asyncio.gather(*(attempt(server) for server in servers))
+
+async def resolve_ns_addresses(resolver, ns_names):
+    """
+    Resolves the A records of the zone's NS hosts; names that do not resolve are left out.
+    """
+    async def lookup(name):
+        try:
+            return [str(rdata) for rdata in await resolver.resolve(name, 'A')]
+        except Exception:
+            return []
+
+    results = await asyncio.gather(*(lookup(name) for name in ns_names))
+    return [address for addresses in results for address in addresses]
+
+def build_resolvers(nameservers, timeout=QUERY_TIMEOUT):
+    """
+    One async resolver per nameserver, so queries can be steered to a specific server.
+    """
+    resolvers = []
+    for ns in nameservers:
+        ns_resolver = dns.asyncresolver.Resolver(configure=False)
+        ns_resolver.nameservers = [nameserver_address(ns)]
+        ns_resolver.timeout = timeout
+        ns_resolver.lifetime = timeout
+        resolvers.append(ns_resolver)
+    return resolvers
+
+async def detect_wildcard(target, nameservers, samples=WILDCARD_SAMPLES, timeout=QUERY_TIMEOUT):
+    """
+    Resolves a few random labels under `target`. Any address they return comes from a wildcard record;
+    returns the set of such addresses (empty if the zone has no wildcard).
+    """
+    resolvers = build_resolvers(nameservers, timeout)
+
+    async def probe(index):
+        label = f"{uuid.uuid4().hex[:16]}.{target}"
+        try:
+            answers = await resolvers[index % len(resolvers)].resolve(label, 'A')
+            return {str(rdata) for rdata in answers}
+        except Exception:
+            return set()
+
+    results = await asyncio.gather(*(probe(i) for i in range(samples)))
+    return set().union(*results)
+
+def parent_names(full_domain, target):
     """
-    Performs DNS and subdomain enumeration on the target.
+    Yields the intermediate names between `full_domain` and `target`, e.g. a.b.c.example.com -> b.c.example.com, c.example.com.
+    """
+    name = full_domain
+    while True:
+        _, _, name = name.partition('.')
+        if not name or len(name) <= len(target):
+            return
+        yield name
+
+async def resolve_subdomains_async(target, wordlist, nameservers, concurrency, on_found,
+                                   on_miss=None, on_error=None, on_done=None,
+                                   timeout=QUERY_TIMEOUT, retries=QUERY_RETRIES, cache=None, wildcard_ips=None,
+                                   rate=None):
+    """
+    Resolves `<entry>.<target>` A records for every wordlist entry with at most `concurrency` queries in flight.
+    Queries are spread round-robin over `nameservers`; a query that times out is retried on the next server.
+    `on_found(full_domain, ips)` is called for answers, `on_miss(full_domain)` for NXDOMAIN/NoAnswer,
+    `on_error(full_domain, exc)` for anything else and `on_done(entry)` once per entry either way.
+    Answers (including negative ones) found in `cache` skip the network.
+    Answers made up only of `wildcard_ips` count as misses, and names under a parent already known to be
+    NXDOMAIN are skipped without a query. Returns counters for both filters.
+    With an AdaptiveRate `rate`, every query is admitted through it and reported back, with timeouts and
+    SERVFAIL as back-off signals.
+    """
+    resolvers = build_resolvers(nameservers, timeout)
+    next_index = itertools.count()
+    nxdomain = CompactHashSet()
+    stats = {'wildcard_filtered': 0, 'nxdomain_skipped': 0}
+
+    def on_answer(full_domain, ips):
+        if wildcard_ips and set(ips) <= wildcard_ips:
+            stats['wildcard_filtered'] += 1
+            if on_miss:
+                on_miss(full_domain)
+        else:
+            on_found(full_domain, ips)
+
+    async def resolve(sub):
+        full_domain = f"{sub}.{target}"
+        query = f"A {full_domain}"
+        start = next(next_index)
+        try:
+            cached = cached_answer(cache, target, query)
+            if cached is not MISS:
+                on_answer(full_domain, cached)
+            elif any(parent in nxdomain for parent in parent_names(full_domain, target)):
+                # Nothing can exist below a name that does not exist (RFC 8020)
+                stats['nxdomain_skipped'] += 1
+                if on_miss:
+                    on_miss(full_domain)
+            else:
+                for attempt in range(retries + 1):
+                    server_index = (start + attempt) % len(resolvers)
+                    ns_resolver = resolvers[server_index]
+                    await ratelimit.wait_async()
+                    if rate:
+                        await rate.acquire()
+                    started = time.monotonic()
+                    try:
+                        answers = await ns_resolver.resolve(full_domain, 'A')
+                    except dns.exception.Timeout:
+                        if rate:
+                            rate.record(error=True, congestion=True)
+                        if attempt == retries:
+                            raise
+                        profiler.count('dns retries')
+                        continue
+                    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+                        if rate:
+                            rate.record(time.monotonic() - started)
+                        store_answer(cache, target, query, error=e)
+                        raise
+                    except dns.resolver.NoNameservers:
+                        # SERVFAIL/REFUSED from the server
+                        if rate:
+                            rate.record(error=True, congestion=True)
+                        raise
+                    finally:
+                        profiler.count('dns queries')
+                        profiler.observe('dns', nameservers[server_index], time.monotonic() - started)
+                    if rate:
+                        rate.record(time.monotonic() - started)
+                    store_answer(cache, target, query, answers)
+                    on_answer(full_domain, [str(rdata) for rdata in answers])
+                    break
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+            if isinstance(e, dns.resolver.NXDOMAIN):
+                nxdomain.add(full_domain)
+            if on_miss:
+                on_miss(full_domain)
+        except Exception as e:
+            profiler.error(e)
+            if on_error:
+                on_error(full_domain, e)
+        if on_done:
+            on_done(sub)
+
+    await run_bounded(wordlist, resolve, concurrency)
+    return stats
+
+def brute_force_subdomains(target, sub_wordlist_path, nameservers, concurrency, resume_file, verbose, sink, console, cache=None,
+                           adaptive=True):
+    """
+    Brute-forces subdomains of `target`, emitting every hit to `sink` as 'subdomains'.
+    A wildcard pre-flight runs first; returns the wildcard addresses it found (empty list if none).
+    With `adaptive`, the query rate is tuned by an AIMD controller and shown live in the progress bar.
+    """
+    console.print(f"\n[bold yellow]Starting Subdomain Brute-forcing with {sub_wordlist_path}...[/bold yellow]")
+    if not os.path.exists(sub_wordlist_path):
+        console.print(f"[bold red]Error: Subdomain wordlist not found at {sub_wordlist_path}[/bold red]")
+        return []
+
+    with profiler.span('dnsenum: wildcard detection'):
+        wildcard_ips = asyncio.run(detect_wildcard(target, nameservers))
+    if wildcard_ips:
+        console.print(
+            f"[yellow]Wildcard DNS detected for *.{target} -> {', '.join(sorted(wildcard_ips))}. "
+            f"Answers pointing only there will be ignored.[/yellow]"
+        )
+
+    sink.section('subdomains')
+    wordlist = Wordlist(sub_wordlist_path)
+    entries = wordlist
+    checkpoint = None
+    if resume_file:
+        checkpoint = Checkpoint(resume_file, 'dnsenum', target)
+        if checkpoint.resumed:
+            for hit in checkpoint.hits:
+                sink.emit('subdomains', hit)
+            console.print(f"[dim]Resuming from {resume_file}: {checkpoint.completed} entries done, {len(checkpoint.hits)} hits restored.[/dim]")
+        entries = checkpoint.pending(wordlist)
+
+    def on_found(full_domain, ips):
+        for ip_address in ips:
+            hit = {'subdomain': full_domain, 'ip': ip_address}
+            if checkpoint and not checkpoint.add_hit(hit):
+                # Already found before the crash and restored from the state file
+                continue
+            reporter.hit(f"    [green]Found {full_domain} -> {ip_address}[/green]", {'module': 'dnsenum', **hit})
+            sink.emit('subdomains', hit)
+
+    rate = ratelimit.AdaptiveRate(initial=concurrency * 5, increase=50.0) if adaptive else None
+
+    def on_done(sub):
+        progress.update(sub_task, advance=1, rate=f"{rate.rate:.0f} q/s" if rate else "")
+        if checkpoint:
+            checkpoint.mark_done(sub)
+
+    def on_miss(full_domain):
+        reporter.miss()
+
+    def on_error(full_domain, e):
+        reporter.error(f"[red]    Error resolving {full_domain}: {e}[/red]")
+
+    with make_progress(
+        console,
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+        TextColumn("[magenta]{task.fields[rate]}")
+    ) as progress, Reporter(console, verbose) as reporter:
+        sub_task = progress.add_task(
+            f"[cyan]Brute-forcing subdomains ({concurrency} in flight, {len(nameservers)} server(s))...",
+            total=len(wordlist), completed=checkpoint.completed if checkpoint else 0,
+            rate=f"{rate.rate:.0f} q/s" if rate else ""
+        )
+        try:
+            with profiler.span('dnsenum: subdomain brute-force'):
+                stats = asyncio.run(resolve_subdomains_async(
+                    target, entries, nameservers, concurrency, on_found, on_miss, on_error, on_done,
+                    cache=cache, wildcard_ips=wildcard_ips, rate=rate
+                ))
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        progress.update(sub_task, description="[green]Subdomain brute-forcing complete![/green]")
+    if stats['wildcard_filtered'] or stats['nxdomain_skipped']:
+        console.print(
+            f"[dim]Ignored {stats['wildcard_filtered']} wildcard answers, "
+            f"skipped {stats['nxdomain_skipped']} names under NXDOMAIN parents.[/dim]"
+        )
+    if rate:
+        console.print(f"[dim]Adaptive rate ended at {rate.rate:.0f} q/s (peak {rate.peak:.0f}, {rate.backoffs} back-offs).[/dim]")
+    return sorted(wildcard_ips)
+
+def zone_transfer(target, resolver, dns_results, custom_nameservers, sink, console, verbose):
+    """
+    Attempts AXFR in parallel against the custom DNS servers and the addresses of the zone's NS records.
+    The first successful transfer is stored under 'zone_transfer' and its A/AAAA names are emitted to `sink`
+    as 'subdomains'. Returns True if any server allowed the transfer.
+    """
+    ns_names = dns_results['records'].get('NS', [])
+
+    async def run():
+        servers = [split_nameserver(ns) for ns in custom_nameservers]
+        for address in await resolve_ns_addresses(resolver, ns_names):
+            if (address, 53) not in servers:
+                servers.append((address, 53))
+        return await attempt_axfr(target, servers) if servers else []
+
+    console.print(f"\n[bold underline]Zone Transfer (AXFR):[/bold underline]")
+    with make_progress(
+        console,
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        transient=True
+    ) as progress:
+        task = progress.add_task("[cyan]Attempting zone transfers...", total=None)
+        attempts = asyncio.run(run())
+        progress.update(task, description="[green]Zone transfer attempts complete![/green]")
+    if not attempts:
+        console.print("  [dim]No name servers to attempt a zone transfer against.[/dim]")
+        return False
+
+    transferred = None
+    for (host, port), records, error in attempts:
+        server = f"{host}:{port}"
+        if records is not None:
+            console.print(f"  [bold green]{server} allowed a zone transfer ({len(records)} records).[/bold green]")
+            if transferred is None:
+                transferred = (server, records)
+        else:
+            console.print(f"  [dim]{server}: transfer refused or failed ({type(error).__name__}).[/dim]")
+            if verbose:
+                console.print(f"[dim]    {error}[/dim]")
+    if transferred is None:
+        return False
+
+    server, records = transferred
+    dns_results['zone_transfer'] = {
+        'server': server,
+        'records': [f"{name} {ttl} {rdtype} {rdata}" for name, ttl, rdtype, rdata in records]
+    }
+    sink.section('subdomains')
+    with Reporter(console, verbose) as reporter:
+        for name, _, rdtype, rdata in records:
+            if rdtype in ('A', 'AAAA') and name.lower() != target.lower():
+                hit = {'subdomain': name, 'ip': rdata}
+                reporter.hit(f"    [green]Found {name} -> {rdata}[/green]", {'module': 'dnsenum', **hit})
+                sink.emit('subdomains', hit)
+    return True
+
+def run_scan(target, sub_brute, sub_wordlist_path, dns_server, verbose, output_file, console, concurrency=DEFAULT_CONCURRENCY,
+             resume_file=None, legacy_json=False, cache=None, adaptive=True):
+    """
+    Performs DNS and subdomain enumeration on the target and returns the results dict.
+    Lookups are served from `cache` (a utils.cache.ResultCache) when given, honouring record TTLs.
+    All record types and the reverse lookup are queried concurrently, then a zone transfer is attempted;
+    if one succeeds, the subdomain brute-force is skipped.
     """
     console.print(f"[blue]Starting DNS Enumeration on {target}...[/blue]")
     dns_results = {'target': target}
+    sink = output_formatter.open_sink(output_file, console, legacy_json)
+
+    custom_nameservers = parse_dns_servers(dns_server)
+    if custom_nameservers:
+        nameservers = custom_nameservers
+        console.print(f"[dim]Using custom DNS server(s): {', '.join(nameservers)}[/dim]")
+    else:
+        nameservers = list(dns.resolver.Resolver().nameservers)
+    resolver = build_resolver(nameservers)
 
-    resolver = dns.resolver.Resolver()
-    if dns_server:
-        resolver.nameservers = [dns_server]
-        console.print(f"[dim]Using custom DNS server: {dns_server}[/dim]")
+    # Reverse DNS Lookup (if target is an IP), issued together with the basic records
+    reverse_name = None
+    ip_parts = target.split('.')
+    if len(ip_parts) == 4 and all(part.isdigit() and 0 <= int(part) <= 255 for part in ip_parts):
+        reverse_name = dns.reversename.from_address(target)
+    elif verbose:
+        console.print("[dim]Skipping reverse DNS lookup as target is not a valid IPv4 address.[/dim]")
 
     # Basic DNS Records
-    record_types = ['A', 'AAAA', 'MX', 'NS', 'TXT', 'SOA']
     dns_results['records'] = {}
 
     console.print(f"\n[bold underline]Basic DNS Records:[/bold underline]")
@@ -28,89 +487,60 @@ def run_scan(target, sub_brute, sub_wordlist_path, dns_server, verbose, output_f
         console=console,
         transient=True
     ) as progress:
-        task = progress.add_task("[cyan]Querying DNS records...", total=len(record_types))
-        for rtype in record_types:
-            try:
-                answers = resolver.resolve(target, rtype)
-                dns_results['records'][rtype] = [str(rdata) for rdata in answers]
-                console.print(f"  [bold]{rtype}:[/bold]")
-                for rdata in answers:
-                    console.print(f"    [green]- {rdata}[/green]")
-            except dns.resolver.NoAnswer:
-                console.print(f"  [dim]{rtype}: No records found.[/dim]")
-            except dns.resolver.NXDOMAIN:
-                console.print(f"  [red]Error: Domain does not exist for {target}[/red]")
-                break # No point continuing if domain doesn't exist
-            except Exception as e:
-                console.print(f"  [red]Error querying {rtype}: {e}[/red]")
-            progress.update(task, advance=1)
+        task = progress.add_task(f"[cyan]Querying {len(RECORD_TYPES)} record types{' and PTR' if reverse_name else ''}...", total=None)
+        with profiler.span('dnsenum: record queries'):
+            answers = asyncio.run(query_records(resolver, target, RECORD_TYPES, cache, reverse_name))
         progress.update(task, description="[green]DNS record query complete![/green]")
 
-    # Reverse DNS Lookup (if target is an IP)
-    try:
-        ip_parts = target.split('.')
-        if len(ip_parts) == 4 and all(part.isdigit() and 0 <= int(part) <= 255 for part in ip_parts):
-            console.print(f"\n[bold underline]Performing Reverse DNS Lookup:[/bold underline]")
-            addr = dns.reversename.from_address(target)
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console,
-                transient=True
-            ) as progress:
-                task = progress.add_task("[cyan]Reverse lookup...", total=None)
-                ptr_records = resolver.resolve(addr, "PTR")
-                dns_results['reverse_dns'] = [str(rdata) for rdata in ptr_records]
-                for rdata in ptr_records:
-                    console.print(f"  [green]{rdata}[/green]")
-                progress.update(task, description="[green]Reverse DNS lookup complete![/green]")
+    domain_exists = True
+    for rtype in RECORD_TYPES:
+        answer = answers[rtype]
+        if isinstance(answer, dns.resolver.NoAnswer):
+            console.print(f"  [dim]{rtype}: No records found.[/dim]")
+        elif isinstance(answer, dns.resolver.NXDOMAIN):
+            if domain_exists:
+                console.print(f"  [red]Error: Domain does not exist for {target}[/red]")
+            domain_exists = False
+        elif isinstance(answer, Exception):
+            profiler.error(answer)
+            console.print(f"  [red]Error querying {rtype}: {answer}[/red]")
         else:
-            if verbose:
-                console.print("[dim]Skipping reverse DNS lookup as target is not a valid IPv4 address.[/dim]")
-    except dns.resolver.NXDOMAIN:
-        console.print(f"  [dim]No reverse DNS record found for {target}.[/dim]")
-    except Exception as e:
-        console.print(f"[red]Error during reverse DNS lookup: {e}[/red]")
-
-
-    # Subdomain Brute-forcing
-    if sub_brute:
-        console.print(f"\n[bold yellow]Starting Subdomain Brute-forcing with {sub_wordlist_path}...[/bold yellow]")
-        if not os.path.exists(sub_wordlist_path):
-            console.print(f"[bold red]Error: Subdomain wordlist not found at {sub_wordlist_path}[/bold red]")
-            return
+            dns_results['records'][rtype] = answer
+            console.print(f"  [bold]{rtype}:[/bold]")
+            for rdata in answer:
+                console.print(f"    [green]- {rdata}[/green]")
+
+    if reverse_name is not None:
+        console.print(f"\n[bold underline]Performing Reverse DNS Lookup:[/bold underline]")
+        ptr_records = answers['PTR']
+        if isinstance(ptr_records, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+            console.print(f"  [dim]No reverse DNS record found for {target}.[/dim]")
+        elif isinstance(ptr_records, Exception):
+            profiler.error(ptr_records)
+            console.print(f"[red]Error during reverse DNS lookup: {ptr_records}[/red]")
+        else:
+            dns_results['reverse_dns'] = ptr_records
+            for rdata in ptr_records:
+                console.print(f"  [green]{rdata}[/green]")
+
+    try:
+        # Zone Transfer: tried against the custom DNS servers and every NS of the zone, all at once
+        zone_transferred = False
+        if reverse_name is None and domain_exists:
+            zone_transferred = zone_transfer(target, resolver, dns_results, custom_nameservers, sink, console, verbose)
 
-        dns_results['subdomains'] = []
-        with open(sub_wordlist_path, 'r') as f:
-            wordlist = [line.strip() for line in f if line.strip()]
-
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-            console=console,
-            transient=False
-        ) as progress:
-            sub_task = progress.add_task("[cyan]Brute-forcing subdomains...", total=len(wordlist))
-            for sub in wordlist:
-                full_domain = f"{sub}.{target}"
-                try:
-                    answers = resolver.resolve(full_domain, 'A')
-                    for rdata in answers:
-                        ip_address = str(rdata)
-                        console.print(f"    [green]Found {full_domain} -> {ip_address}[/green]")
-                        dns_results['subdomains'].append({'subdomain': full_domain, 'ip': ip_address})
-                except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
-                    if verbose:
-                        console.print(f"[dim]    {full_domain}: No record.[/dim]")
-                except Exception as e:
-                    if verbose:
-                        console.print(f"[red]    Error resolving {full_domain}: {e}[/red]")
-                progress.update(sub_task, advance=1)
-            progress.update(sub_task, description="[green]Subdomain brute-forcing complete![/green]")
-
-    if output_file:
-        output_formatter.save_results(output_file, dns_results, console)
+        # Subdomain Brute-forcing
+        if sub_brute and zone_transferred:
+            console.print("[yellow]Zone transfer succeeded, skipping subdomain brute-forcing.[/yellow]")
+        elif sub_brute:
+            wildcard_ips = brute_force_subdomains(target, sub_wordlist_path, nameservers, concurrency, resume_file, verbose, sink, console, cache,
+                                                  adaptive)
+            if wildcard_ips:
+                dns_results['wildcard_ips'] = wildcard_ips
+    finally:
+        # Whatever was found so far is saved even if the scan was interrupted
+        dns_results = sink.close(dns_results)
+    return dns_results
 
 # Example usage (for testing this module directly)
 if __name__ == "__main__":
@@ -1,82 +1,393 @@
 # modules/portscan.py
 
-import nmap
-from rich.progress import Progress, SpinnerColumn, TextColumn
+import asyncio
+import ipaddress
+import math
+import os
+import re
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
 
-def run_scan(target, ports, full_scan, udp_scan, verbose, output_file, console):
+from utils import output_formatter, profiler, ratelimit
+from utils.concurrency import run_bounded
+from utils.streaming import nmap_xml_parser, stream_command
+
+DEFAULT_CONCURRENCY = 500
+DEFAULT_CONNECT_TIMEOUT = 1.0
+DEFAULT_NMAP_WORKERS = 4
+# Most ports per nmap shard. UDP probes are slow (ICMP rate limiting), so UDP work is cut finer
+SHARD_PORTS = {'tcp': 4096, 'udp': 256}
+HOSTS_PER_SHARD = 16
+# How often nmap reports <taskprogress> for the per-shard progress bars
+NMAP_STATS_EVERY = "2s"
+OCTET_RANGE_RE = re.compile(r"^(\d{1,3}\.\d{1,3}\.\d{1,3}\.)(\d{1,3})-(\d{1,3})$")
+NMAP_SERVICES_PATHS = [
+    "/usr/share/nmap/nmap-services",
+    "/usr/local/share/nmap/nmap-services",
+    "/opt/homebrew/share/nmap/nmap-services",
+]
+
+def parse_ports(spec):
+    """
+    Expands a port specification such as '22,80,443' or '1-1024,8080' into a sorted list of ports.
+    Returns None for specs that only nmap understands (e.g. 'top1000').
+    """
+    ports = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            low, _, high = part.partition('-')
+            if not (low.isdigit() and high.isdigit()):
+                return None
+            ports.update(range(int(low), int(high) + 1))
+        elif part.isdigit():
+            ports.add(int(part))
+        else:
+            return None
+    return sorted(p for p in ports if 0 < p < 65536)
+
+def top_ports(count, proto='tcp'):
+    """
+    Returns nmap's `count` most frequently open ports for `proto`, read from the local nmap-services file.
+    Returns None if the file cannot be found.
+    """
+    for path in NMAP_SERVICES_PATHS:
+        if not os.path.exists(path):
+            continue
+        entries = []
+        with open(path, 'r') as f:
+            for line in f:
+                if line.startswith('#'):
+                    continue
+                fields = line.split()
+                if len(fields) < 3 or not fields[1].endswith(f"/{proto}"):
+                    continue
+                try:
+                    entries.append((float(fields[2]), int(fields[1].split('/')[0])))
+                except ValueError:
+                    continue
+        entries.sort(reverse=True)
+        return sorted(port for _, port in entries[:count])
+    return None
+
+def resolve_ports(ports, full_scan, proto='tcp'):
+    """
+    Turns the CLI port options into an explicit list of `proto` ports,
+    or None if the selection cannot be expanded locally.
+    """
+    if full_scan:
+        return list(range(1, 65536))
+    if ports.startswith('top') and ports[3:].isdigit():
+        return top_ports(int(ports[3:]), proto)
+    return parse_ports(ports)
+
+def expand_hosts(target):
+    """
+    Lists the hosts in a multi-host nmap target: a CIDR range or a last-octet range such as 10.0.0.1-20.
+    Any other target is a single host.
+    """
+    if '/' in target:
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            return [target]
+        return [str(host) for host in network.hosts()] or [str(network.network_address)]
+    match = OCTET_RANGE_RE.match(target)
+    if match and int(match.group(2)) <= int(match.group(3)) <= 255:
+        return [f"{match.group(1)}{octet}" for octet in range(int(match.group(2)), int(match.group(3)) + 1)]
+    return [target]
+
+def compact_ports(ports):
+    """
+    Renders a sorted port list in nmap syntax, e.g. [1, 2, 3, 80] -> '1-3,80'.
+    """
+    ranges = []
+    for port in ports:
+        if ranges and port == ranges[-1][1] + 1:
+            ranges[-1][1] = port
+        else:
+            ranges.append([port, port])
+    return ','.join(str(low) if low == high else f"{low}-{high}" for low, high in ranges)
+
+def port_arguments(spec):
+    """
+    nmap arguments selecting the ports in `spec` ('topN' becomes --top-ports N).
+    """
+    if spec.startswith('top') and spec[3:].isdigit():
+        return ['--top-ports', spec[3:]]
+    return ['-p', spec]
+
+def plan_shards(hosts, port_list, ports, proto, workers):
     """
-    Performs a port scan on the target using python-nmap.
+    Splits a scan into (hosts, port spec) shards: hosts in groups of HOSTS_PER_SHARD, ports in chunks of
+    at most SHARD_PORTS[proto], cut finer when there are too few host groups to keep every worker busy.
+    A port selection that could not be expanded locally (`port_list` None) is passed to nmap whole as `ports`.
+    """
+    host_groups = [hosts[i:i + HOSTS_PER_SHARD] for i in range(0, len(hosts), HOSTS_PER_SHARD)]
+    if port_list is None:
+        port_specs = [ports]
+    else:
+        chunks = math.ceil(max(1, workers) / len(host_groups))
+        size = max(1, min(SHARD_PORTS[proto], math.ceil(len(port_list) / chunks)))
+        port_specs = [compact_ports(port_list[i:i + size]) for i in range(0, len(port_list), size)]
+    return [(group, spec) for group in host_groups for spec in port_specs]
+
+def nmap_command(hosts, port_spec, arguments):
+    return ['nmap', *arguments, *port_arguments(port_spec), '--stats-every', NMAP_STATS_EVERY, '-oX', '-', *hosts]
+
+def shard_label(hosts, port_spec):
+    host_label = hosts[0] if len(hosts) == 1 else f"{hosts[0]} +{len(hosts) - 1} hosts"
+    port_label = port_spec if len(port_spec) <= 24 else port_spec[:21] + '...'
+    return f"{host_label} ports {port_label}"
+
+def run_nmap_shards(shards, arguments, workers, console, host_key=None):
+    """
+    Runs every (hosts, port spec) shard as its own `nmap -oX -` process, at most `workers` at a time, and merges
+    each port into {address: {'status', 'protocols'}} the moment it streams in. With `host_key`, everything
+    is filed under that name instead of the address nmap reports.
+    Returns (merged results, [(shard, CalledProcessError)] for the shards that failed).
+    Raises FileNotFoundError if nmap is not installed.
+    """
+    merged = {}
+    failures = []
+    lock = threading.Lock()
+    open_ports = 0
+
+    def host_entry(address):
+        return merged.setdefault(host_key or address, {'status': 'unknown', 'protocols': {}})
+
+    def on_host(address, state):
+        with lock:
+            entry = host_entry(address)
+            if entry['status'] != 'up':
+                entry['status'] = state
+
+    def on_record(record):
+        nonlocal open_ports
+        with lock:
+            entry = host_entry(record['address'])
+            entry['protocols'].setdefault(record['protocol'], {})[record['port']] = {
+                'state': record['state'],
+                'service': record['service'],
+                'product': record['product'],
+                'version': record['version'],
+                'extrainfo': record['extrainfo']
+            }
+            if record['state'] == 'open':
+                open_ports += 1
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+        console=console,
+        transient=True
+    ) as progress:
+        overall = progress.add_task(f"[cyan]Nmap scanning: 0/{len(shards)} shards done...", total=len(shards))
+
+        def run_shard(hosts, port_spec):
+            label = shard_label(hosts, port_spec)
+            task = progress.add_task(f"[dim]  {label}[/dim]", total=100)
+
+            def on_progress(name, percent):
+                progress.update(task, completed=percent, description=f"[dim]  {label} ({name})[/dim]")
+
+            try:
+                with profiler.span('portscan: nmap shard', hosts=len(hosts), ports=port_spec):
+                    stream_command(nmap_command(hosts, port_spec, arguments), nmap_xml_parser(on_host, on_progress), on_record)
+            finally:
+                progress.remove_task(task)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(run_shard, hosts, port_spec): (hosts, port_spec) for hosts, port_spec in shards}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    future.result()
+                except FileNotFoundError:
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                except subprocess.CalledProcessError as e:
+                    profiler.error(e)
+                    failures.append((futures[future], e))
+                    console.print(f"[red]Nmap shard {shard_label(*futures[future])} failed (exit {e.returncode}): {e.stderr}[/red]")
+                profiler.count('nmap shards')
+                progress.update(overall, advance=1,
+                                description=f"[cyan]Nmap scanning: {done}/{len(shards)} shards done, {open_ports} open port(s)...")
+    return merged, failures
+
+def sorted_host(host):
+    """
+    A merged host entry with its ports in order (shards finish in any order).
+    """
+    return {
+        'status': host['status'],
+        'protocols': {proto: dict(sorted(ports.items())) for proto, ports in sorted(host['protocols'].items())}
+    }
+
+def print_host_results(name, host, console):
+    console.print(f"\n[bold underline]Scan Results for {name}:[/bold underline]")
+    console.print(f"  Status: [green]{host['status']}[/green]")
+    for proto, ports in host['protocols'].items():
+        console.print(f"  Protocol: [bold magenta]{proto}[/bold magenta]")
+        for port, port_info in ports.items():
+            console.print(
+                f"    Port: [cyan]{port}/{proto}[/cyan]\t"
+                f"State: [yellow]{port_info['state']}[/yellow]\t"
+                f"Service: [green]{port_info['service']}[/green] "
+                f"{port_info['product']} {port_info['version']} {port_info['extrainfo']}"
+            )
+
+def address_key(address):
+    try:
+        return (0, ipaddress.ip_address(address))
+    except ValueError:
+        return (1, address)
+
+async def connect_scan(address, ports, concurrency, timeout, on_done=None):
+    """
+    Sweeps `ports` on `address` with plain TCP connects, at most `concurrency` sockets open at once.
+    Returns (open_ports, host_seen) where host_seen is True if any port answered (open or refused).
+    """
+    open_ports = []
+    host_seen = False
+
+    async def probe(port):
+        nonlocal host_seen
+        await ratelimit.wait_async()
+        started = time.monotonic()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+            profiler.observe('tcp connect', address, time.monotonic() - started)
+            open_ports.append(port)
+            host_seen = True
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        except ConnectionRefusedError:
+            profiler.observe('tcp connect', address, time.monotonic() - started)
+            host_seen = True
+        except (asyncio.TimeoutError, OSError) as e:
+            profiler.error(e)
+        profiler.count('tcp connects')
+        if on_done:
+            on_done()
+
+    await run_bounded(ports, probe, concurrency)
+    return sorted(open_ports), host_seen
+
+def run_prescan(target, ports, full_scan, concurrency, timeout, console):
+    """
+    Runs the asyncio connect pre-scan with a progress bar.
+    Returns (address, open_ports, host_seen), or None if the port selection cannot be expanded.
+    """
+    port_list = resolve_ports(ports, full_scan)
+    if port_list is None:
+        console.print(f"[dim]Cannot expand port selection '{ports}' locally, skipping connect pre-scan.[/dim]")
+        return None
+    address = socket.getaddrinfo(target, None, type=socket.SOCK_STREAM)[0][4][0]
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+        console=console,
+        transient=True
+    ) as progress:
+        task = progress.add_task(f"[cyan]Connect-scanning {len(port_list)} TCP ports...", total=len(port_list))
+        with profiler.span('portscan: connect pre-scan', address=address, ports=len(port_list)):
+            open_ports, host_seen = asyncio.run(connect_scan(
+                address, port_list, concurrency, timeout,
+                on_done=lambda: progress.update(task, advance=1)
+            ))
+    console.print(f"[dim]Connect pre-scan found {len(open_ports)} open TCP port(s) on {address}.[/dim]")
+    return address, open_ports, host_seen
+
+def run_scan(target, ports, full_scan, udp_scan, verbose, output_file, console,
+             prescan=True, concurrency=DEFAULT_CONCURRENCY, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+             nmap_workers=DEFAULT_NMAP_WORKERS):
+    """
+    Performs a port scan on the target with nmap and returns the results dict.
+    Unless disabled, a fast asyncio TCP connect sweep runs first and only the open ports are handed to nmap -sV.
+    The port range, and the host list of a multi-host target (CIDR or 10.0.0.1-20), are split into shards that run
+    as separate nmap processes, `nmap_workers` at a time; ports are merged into the results as they stream in.
     """
     console.print(f"[blue]Starting Nmap scan on {target}...[/blue]")
 
-    nm = nmap.PortScanner()
-    nmap_args = f"-sV {'-sU' if udp_scan else ''} {'-p 1-65535' if full_scan else f'-p {ports}'}"
+    proto = 'udp' if udp_scan else 'tcp'
+    hosts = expand_hosts(target)
+    single_host = target if len(hosts) == 1 else None
+    arguments = ['-sV'] + (['-sU'] if udp_scan else [])
+    port_list = resolve_ports(ports, full_scan, proto)
+    scan_results = {}
 
     try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-            transient=True
-        ) as progress:
-            task = progress.add_task("[cyan]Nmap scanning...", total=None) # Total is None for indefinite task
-
-            # Execute Nmap scan
-            # Note: Nmap often requires root privileges for certain scan types (e.g., -sS, -sU)
-            # You might need to run your main script with `sudo python3 main.py ...`
-            # or configure Nmap to run without sudo for specific users (advanced)
-            nm.scan(target, arguments=nmap_args)
-
-            progress.update(task, description="[green]Nmap scan complete![/green]")
-
-        scan_results = {}
-        if target in nm.all_hosts():
-            host = nm[target]
-            scan_results['host'] = target
-            scan_results['status'] = host.state()
-            scan_results['protocols'] = {}
-
-            console.print(f"\n[bold underline]Scan Results for {target}:[/bold underline]")
-            console.print(f"  Status: [green]{host.state()}[/green]")
-
-            for proto in host.all_protocols():
-                scan_results['protocols'][proto] = {}
-                console.print(f"  Protocol: [bold magenta]{proto}[/bold magenta]")
-                lport = host[proto].keys()
-                sorted_ports = sorted(lport)
-                for port in sorted_ports:
-                    port_info = host[proto][port]
-                    state = port_info['state']
-                    service = port_info['name']
-                    product = port_info['product']
-                    version = port_info['version']
-                    extra_info = port_info['extrainfo']
-
-                    scan_results['protocols'][proto][port] = {
-                        'state': state,
-                        'service': service,
-                        'product': product,
-                        'version': version,
-                        'extrainfo': extra_info
-                    }
-
-                    console.print(
-                        f"    Port: [cyan]{port}/{proto}[/cyan]\t"
-                        f"State: [yellow]{state}[/yellow]\t"
-                        f"Service: [green]{service}[/green] "
-                        f"{product} {version} {extra_info}"
-                    )
+        if prescan and udp_scan:
+            console.print("[dim]Connect pre-scan only covers TCP, running nmap directly for UDP.[/dim]")
+        elif prescan and len(hosts) > 1:
+            console.print(f"[dim]Connect pre-scan covers a single host, running nmap directly for {len(hosts)} hosts.[/dim]")
+        elif prescan:
+            prescan_result = run_prescan(target, ports, full_scan, concurrency, connect_timeout, console)
+            if prescan_result is not None:
+                address, open_ports, host_seen = prescan_result
+                if not open_ports:
+                    console.print(f"\n[bold underline]Scan Results for {target}:[/bold underline]")
+                    console.print(f"  [yellow]No open TCP ports found.[/yellow]")
+                    scan_results = {'host': target, 'status': 'up' if host_seen else 'unknown', 'protocols': {}}
+                    if output_file:
+                        output_formatter.save_results(output_file, scan_results, console)
+                    return scan_results
+                # Host is known to be up, so skip nmap's host discovery as well
+                hosts, port_list = [address], open_ports
+                arguments.append('-Pn')
+
+        # Note: Nmap often requires root privileges for certain scan types (e.g., -sS, -sU)
+        # You might need to run your main script with `sudo python3 main.py ...`
+        # or configure Nmap to run without sudo for specific users (advanced)
+        shards = plan_shards(hosts, port_list, ports, proto, nmap_workers)
+        if len(shards) > 1:
+            console.print(f"[dim]Running nmap as {len(shards)} shards, {min(nmap_workers, len(shards))} at a time.[/dim]")
+        with profiler.span('portscan: nmap', arguments=' '.join(arguments), shards=len(shards)):
+            merged, failures = run_nmap_shards(shards, arguments, nmap_workers, console, host_key=single_host)
+
+        if single_host:
+            if single_host in merged:
+                host = sorted_host(merged[single_host])
+                scan_results = {'host': target, 'status': host['status'], 'protocols': host['protocols']}
+                print_host_results(target, host, console)
         else:
+            scan_results = {
+                'host': target,
+                'hosts': {address: sorted_host(merged[address]) for address in sorted(merged, key=address_key)}
+            }
+            for address, host in scan_results['hosts'].items():
+                print_host_results(address, host, console)
+        if not merged:
             console.print(f"[red]No hosts found or target is down.[/red]")
+        if failures:
+            console.print(f"[yellow]{len(failures)} of {len(shards)} nmap shards failed; their ports are missing from the results.[/yellow]")
 
         # You can then use output_formatter to save these results
         if output_file:
             output_formatter.save_results(output_file, scan_results, console)
+        return scan_results
 
-    except nmap.PortScannerError as e:
-        console.print(f"[bold red]Nmap Error: {e}[/bold red]")
+    except FileNotFoundError as e:
+        profiler.error(e)
+        console.print(f"[bold red]Nmap Error: nmap executable not found ({e.filename}).[/bold red]")
         console.print("[dim]Please ensure Nmap is installed and you have sufficient permissions (e.g., run with sudo for full scans).[/dim]")
     except Exception as e:
+        profiler.error(e)
         console.print(f"[bold red]An unexpected error occurred during port scan: {e}[/bold red]")
 
 # Example usage (for testing this module directly)
@@ -1,14 +1,798 @@
 # modules/webscan.py
 
+import asyncio
+import heapq
+import itertools
+import time
+import uuid
+from collections import deque
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse, urljoin, urldefrag, urlsplit, quote
+from rich.markup import escape
 from rich.progress import Progress, SpinnerColumn, TextColumn
 import os
 
-def run_scan(target, url, dir_brute, wordlist_path, verbose, output_file, console):
+from utils import htmlstream, httpclient, output_formatter, profiler, ratelimit
+from utils.concurrency import run_bounded
+from utils.wordlist import Wordlist, Expansion, CompactHashSet
+from utils.checkpoint import Checkpoint
+from utils.cache import MISS
+from utils.reporter import Reporter, make_progress
+
+DEFAULT_CONCURRENCY = 20
+MAX_BODY_BYTES = 64 * 1024
+REQUEST_TIMEOUT = 5
+# Requests written back to back on one connection before reading their responses (--engine fast)
+PIPELINE_DEPTH = 8
+# Attempts per probe on the fast engine, since pipelined requests die with their connection
+FAST_ATTEMPTS = 2
+# Characters left as they are when percent-encoding a request target (the set requests uses)
+REQUEST_TARGET_SAFE = "!#$%&'()*+,/:;=?@[]~"
+CALIBRATION_SAMPLES = ["{token}", "{token}/", "{token}.php", "{token}.html"]
+# Responses that mean the server wants us to slow down
+BACKOFF_STATUSES = (429, 503)
+# Extra passes over entries that were answered with a back-off status, and the pause before the first one
+THROTTLE_RETRIES = 3
+THROTTLE_RETRY_DELAY = 1.0
+# Statuses worth recursing into, mapped to their frontier priority (lower is scanned first)
+DIRECTORY_PRIORITY = {200: 0, 204: 0, 301: 1, 302: 1, 307: 1, 308: 1, 401: 2, 403: 2}
+# Crawler: pages are parsed as they stream in, CRAWL_CHUNK bytes at a time, and never read past MAX_CRAWL_PAGE_BYTES
+CRAWL_CHUNK = 16 * 1024
+MAX_CRAWL_PAGE_BYTES = 8 * 1024 * 1024
+DEFAULT_CRAWL_DEPTH = 3
+DEFAULT_MAX_PAGES = 200
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def build_session(concurrency=DEFAULT_CONCURRENCY):
+    """
+    Creates a requests Session whose per-host keep-alive pool is sized for `concurrency` workers,
+    so brute-force probes reuse TCP/TLS connections instead of handshaking every time.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, concurrency), max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def redirect_template(location, entry):
+    """
+    Replaces the probed entry in a Location header with a placeholder, so redirects that merely
+    echo the requested path (e.g. everything -> /login?next=<path>) compare equal.
+    """
+    if not location:
+        return None
+    entry = entry.strip('/')
+    return location.replace(entry, '{FUZZ}') if entry else location
+
+def fetch_summary(session, test_url, entry='', baselines=None):
+    """
+    Fetches `test_url` without following redirects and reduces the response to a small, cacheable summary:
+    status, length, word/line counts and redirect target. At most MAX_BODY_BYTES of the body are read, and
+    a response whose headers already match a calibrated baseline is dropped without reading the body at all.
+    """
+    started = time.monotonic()
+    response = session.get(test_url, timeout=REQUEST_TIMEOUT, stream=True, allow_redirects=False)
+    profiler.count('http requests')
+    try:
+        declared = response.headers.get('Content-Length')
+        summary = {
+            'status_code': response.status_code,
+            'content_length': int(declared) if declared and declared.isdigit() else None,
+            'redirect': response.headers.get('Location'),
+        }
+        if summary['content_length'] is not None and matches_baseline(summary, baselines, entry):
+            return summary
+
+        body = b''
+        for chunk in response.iter_content(8192):
+            body += chunk
+            if len(body) >= MAX_BODY_BYTES:
+                body = body[:MAX_BODY_BYTES]
+                break
+        profiler.count('http bytes read', len(body))
+        if summary['content_length'] is None:
+            summary['content_length'] = len(body)
+        summary['words'] = len(body.split())
+        summary['lines'] = body.count(b'\n') + 1 if body else 0
+        return summary
+    finally:
+        release_response(response)
+        profiler.observe('http', profiler.host_of(test_url), time.monotonic() - started)
+
+def release_response(response, max_drain=MAX_BODY_BYTES):
+    """
+    Hands a streamed response's connection back to the session's keep-alive pool. Closing a response whose body
+    was not read to the end makes urllib3 drop the socket, so an unread remainder of at most `max_drain` bytes
+    (by Content-Length) is read and discarded first; only large or unbounded (chunked, close-delimited) bodies
+    cost the connection.
+    """
+    declared = response.headers.get('Content-Length')
+    if declared and declared.isdigit() and int(declared) - response.raw.tell() <= max_drain:
+        response.raw.drain_conn()
+        response.raw.release_conn()
+    else:
+        response.close()
+
+def calibrate(session, url, samples=CALIBRATION_SAMPLES):
+    """
+    Requests a few random paths that cannot exist (one per pattern in `samples`) and fingerprints how the server
+    answers them. Returns one baseline per status code seen: the sets of lengths, word and line counts, and the
+    redirect template.
+    """
+    baselines = {}
+    for pattern in samples:
+        entry = pattern.format(token=uuid.uuid4().hex[:12])
+        try:
+            summary = fetch_summary(session, urljoin(url, entry), entry)
+        except requests.exceptions.RequestException as e:
+            profiler.error(e)
+            continue
+        baseline = baselines.setdefault(summary['status_code'], {
+            'status_code': summary['status_code'], 'sizes': set(), 'words': set(), 'lines': set(), 'redirects': set()
+        })
+        baseline['sizes'].add(summary['content_length'])
+        baseline['words'].add(summary.get('words'))
+        baseline['lines'].add(summary.get('lines'))
+        baseline['redirects'].add(redirect_template(summary.get('redirect'), entry))
+    return list(baselines.values())
+
+def matches_baseline(summary, baselines, entry=''):
+    """
+    True if `summary` looks like the server's answer for a non-existent path. Only metrics that were stable across
+    the calibration probes are used: same status and redirect template as a baseline, then either the same length,
+    or the same word and line counts (for pages that echo the path back), or the same redirect target.
+    """
+    for baseline in baselines or []:
+        if summary['status_code'] != baseline['status_code']:
+            continue
+        if redirect_template(summary.get('redirect'), entry) not in baseline['redirects']:
+            continue
+        if len(baseline['sizes']) == 1 and summary.get('content_length') in baseline['sizes']:
+            return True
+        stable = [(key, next(iter(baseline[key]))) for key in ('words', 'lines')
+                  if len(baseline[key]) == 1 and None not in baseline[key]]
+        if stable and all(summary.get(key) == value for key, value in stable):
+            return True
+        if len(baseline['redirects']) == 1 and None not in baseline['redirects']:
+            return True
+    return False
+
+async def dir_brute_async(session, url, wordlist, concurrency, on_result, on_error=None, on_done=None, cache=None,
+                          baselines=None, rate=None, on_request=None):
+    """
+    Probes `urljoin(url, entry)` for every wordlist entry with at most `concurrency` requests in flight.
+    Blocking requests calls run on a thread pool sharing `session`, driven from the asyncio loop.
+    `on_result(entry, test_url, summary)` is called for every response, `on_error(test_url, exc)` for request errors
+    and `on_done(entry)` once per entry either way. Summaries found in `cache` skip the network entirely;
+    429/503 answers are never cached, so a retry goes back to the server.
+    `baselines` from calibrate() let fetch_summary() drop soft-404 responses before reading their bodies.
+    With an AdaptiveRate `rate`, every request is admitted through it and reported back, with timeouts and
+    429/503 responses as back-off signals.
+    `on_request()` is called before every network request (cache hits excluded); if it returns False the request
+    is not sent and the entry is left unfinished (no on_done), e.g. once a request budget is spent.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+
+    async def probe(entry):
+        test_url = urljoin(url, entry)
+        summary = cache.get('webscan', url, test_url) if cache else MISS
+        if summary is not MISS:
+            on_result(entry, test_url, summary)
+            if on_done:
+                on_done(entry)
+            return
+        if on_request and not on_request():
+            return
+        await ratelimit.wait_async()
+        if rate:
+            await rate.acquire()
+        started = time.monotonic()
+        try:
+            summary = await loop.run_in_executor(executor, fetch_summary, session, test_url, entry, baselines)
+            if rate:
+                rate.record(time.monotonic() - started, congestion=summary['status_code'] in BACKOFF_STATUSES)
+            if cache and summary['status_code'] not in BACKOFF_STATUSES:
+                cache.put('webscan', url, test_url, summary)
+            on_result(entry, test_url, summary)
+        except requests.exceptions.RequestException as req_e:
+            profiler.error(req_e)
+            if rate:
+                rate.record(error=True, congestion=isinstance(req_e, requests.exceptions.Timeout))
+            if on_error:
+                on_error(test_url, req_e)
+        if on_done:
+            on_done(entry)
+
+    try:
+        await run_bounded(wordlist, probe, concurrency)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def summarize_probe(response, entry='', baselines=None):
+    """
+    fetch_summary() for a response read by utils.httpclient.read_probe(): the same summary from the raw status,
+    Content-Length and Location, with word and line counts only taken when the headers do not already match a baseline.
+    """
+    declared = response.headers.get('content-length')
+    summary = {
+        'status_code': response.status,
+        'content_length': int(declared) if declared and declared.isdigit() else None,
+        'redirect': response.headers.get('location'),
+    }
+    if summary['content_length'] is not None and matches_baseline(summary, baselines, entry):
+        return summary
+    body = response.body
+    profiler.count('http bytes read', len(body))
+    if summary['content_length'] is None:
+        summary['content_length'] = len(body)
+    summary['words'] = len(body.split())
+    summary['lines'] = body.count(b'\n') + 1 if body else 0
+    return summary
+
+def request_target(test_url):
     """
-    Performs web enumeration on the target.
+    The percent-encoded path and query of `test_url`, as bytes for a request line.
+    """
+    parts = urlsplit(test_url)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    return quote(target, safe=REQUEST_TARGET_SAFE).encode('ascii')
+
+async def dir_brute_fast(url, wordlist, concurrency, on_result, on_error=None, on_done=None, cache=None,
+                         baselines=None, rate=None, depth=PIPELINE_DEPTH, on_request=None):
+    """
+    dir_brute_async() on the raw HTTP/1.1 client (--engine fast). `concurrency` keep-alive connections each write
+    up to `depth` pre-built GET requests in one go, then read the responses back in order with read_probe(), which
+    parses only what the summary needs. A probe whose connection drops is retried on a new connection, up to
+    FAST_ATTEMPTS times; requests queued behind it on the dead connection are simply sent again.
+    Callbacks, `cache`, `baselines`, `rate` and `on_request` behave as in dir_brute_async(); a retry is a new
+    request and goes through `on_request` again.
+    """
+    parsed = urlparse(url)
+    tls = parsed.scheme == 'https'
+    port = parsed.port or (443 if tls else 80)
+    ssl_context = httpclient.insecure_context() if tls else None
+    suffix = httpclient.request_suffix(parsed.netloc)
+    host = profiler.host_of(url)
+    entries = iter(wordlist)
+    retries = deque()
+
+    def finish(entry):
+        if on_done:
+            on_done(entry)
+
+    def failed(item, error):
+        profiler.error(error)
+        if rate:
+            rate.record(error=True, congestion=isinstance(error, asyncio.TimeoutError))
+        item[3] += 1
+        if item[3] < FAST_ATTEMPTS:
+            retries.append(item)
+            return
+        if on_error:
+            on_error(item[1], error)
+        finish(item[0])
+
+    def next_item():
+        """
+        The next probe to send, or None once the wordlist is done. Cached entries are answered on the way.
+        """
+        while True:
+            if retries:
+                return retries.popleft()
+            entry = next(entries, None)
+            if entry is None:
+                return None
+            test_url = urljoin(url, entry)
+            summary = cache.get('webscan', url, test_url) if cache else MISS
+            if summary is MISS:
+                return [entry, test_url, b'GET ' + request_target(test_url) + suffix, 0]
+            on_result(entry, test_url, summary)
+            finish(entry)
+
+    async def next_batch():
+        batch = []
+        while len(batch) < depth:
+            # Behind the first request, only pipeline what the adaptive rate already allows
+            if batch and rate and not rate.try_acquire():
+                break
+            item = next_item()
+            if item is None:
+                break
+            if on_request and not on_request():
+                continue
+            await ratelimit.wait_async()
+            if rate and not batch:
+                await rate.acquire()
+            batch.append(item)
+        return batch
+
+    async def exchange(connection, batch):
+        """
+        Pipelines `batch` over `connection`. Returns the connection if it can take another batch, else None.
+        """
+        reader, writer = connection
+        # Each response is timed from the one before it, so pipeline position does not count as latency
+        started = time.monotonic()
+        writer.write(b''.join(item[2] for item in batch))
+        for index, item in enumerate(batch):
+            entry, test_url = item[0], item[1]
+            try:
+                if index == 0:
+                    await writer.drain()
+                response = await asyncio.wait_for(httpclient.read_probe(reader, MAX_BODY_BYTES), REQUEST_TIMEOUT)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, httpclient.ResponseError) as e:
+                writer.close()
+                failed(item, e)
+                retries.extend(batch[index + 1:])
+                return None
+            now = time.monotonic()
+            latency, started = now - started, now
+            profiler.count('http requests')
+            profiler.observe('http', host, latency)
+            summary = summarize_probe(response, entry, baselines)
+            if rate:
+                rate.record(latency, congestion=summary['status_code'] in BACKOFF_STATUSES)
+            if cache and summary['status_code'] not in BACKOFF_STATUSES:
+                cache.put('webscan', url, test_url, summary)
+            on_result(entry, test_url, summary)
+            finish(entry)
+            if not response.keep_alive:
+                # The server closes after this response; whatever was pipelined behind it goes out again
+                writer.close()
+                retries.extend(batch[index + 1:])
+                return None
+        return connection
+
+    async def worker():
+        connection = None
+        try:
+            while True:
+                batch = await next_batch()
+                if not batch:
+                    return
+                if connection is None:
+                    try:
+                        connection = await httpclient.open_connection(parsed.hostname, port, ssl_context, parsed.hostname,
+                                                                      REQUEST_TIMEOUT)
+                    except (OSError, asyncio.TimeoutError) as e:
+                        for item in batch:
+                            failed(item, e)
+                        continue
+                connection = await exchange(connection, batch)
+        finally:
+            if connection:
+                connection[1].close()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+async def retry_throttled(run_pass, entries, throttled, attempts=THROTTLE_RETRIES, delay=THROTTLE_RETRY_DELAY,
+                          can_retry=None):
+    """
+    Awaits `run_pass(entries)`, then runs the entries its on_result put in `throttled` (answered 429/503) through
+    again, up to `attempts` more passes with a growing pause before each. `can_retry()` returning False stops early,
+    e.g. once a request budget is spent. Whatever is left in `throttled` afterwards never got a real answer.
+    """
+    await run_pass(entries)
+    for attempt in range(1, attempts + 1):
+        if not throttled or (can_retry and not can_retry()):
+            return
+        await asyncio.sleep(delay * attempt)
+        retry = list(throttled)
+        throttled.clear()
+        await run_pass(retry)
+
+def dir_hit(test_url, summary):
+    """
+    The 'dir_brute_results' record for a response that survived the 404 and soft-404 filters.
+    """
+    hit = {
+        'url': test_url,
+        'status_code': summary['status_code'],
+        'content_length': summary['content_length']
+    }
+    if summary.get('redirect'):
+        hit['redirect'] = summary['redirect']
+    return hit
+
+def fetch_page(session, page_url):
+    """
+    Fetches `page_url` for the crawler without following redirects. HTML bodies are parsed by utils.htmlstream
+    while they stream in, so only what the parser extracts is kept, never the body; reading stops after
+    MAX_CRAWL_PAGE_BYTES. Returns the page record and its PageCollector (None for non-HTML responses,
+    whose bodies are not read at all).
+    """
+    started = time.monotonic()
+    response = session.get(page_url, timeout=REQUEST_TIMEOUT, stream=True, allow_redirects=False)
+    profiler.count('http requests')
+    try:
+        content_type, _, params = response.headers.get('Content-Type', '').partition(';')
+        content_type = content_type.strip().lower()
+        page = {'url': page_url, 'status_code': response.status_code, 'content_type': content_type}
+        if response.headers.get('Location'):
+            page['redirect'] = urljoin(page_url, response.headers['Location'])
+        if content_type not in HTML_TYPES:
+            return page, None
+        charset = params.partition('charset=')[2] or None
+        read = 0
+
+        def chunks():
+            nonlocal read
+            for chunk in response.iter_content(CRAWL_CHUNK):
+                read += len(chunk)
+                yield chunk
+                if read >= MAX_CRAWL_PAGE_BYTES:
+                    page['truncated'] = True
+                    return
+
+        collector = htmlstream.parse_chunks(page_url, chunks(), charset)
+        profiler.count('http bytes read', read)
+        page['bytes'] = read
+        if collector.title:
+            page['title'] = collector.title
+        page['links'] = len(collector.links)
+        return page, collector
+    finally:
+        release_response(response)
+        profiler.observe('http', profiler.host_of(page_url), time.monotonic() - started)
+
+def url_origin(url):
+    """
+    (scheme, host, port) of `url`, with the scheme's default port filled in, so http://host and http://host:80
+    are the same origin. None if the port is not a number.
+    """
+    parts = urlsplit(url)
+    try:
+        port = parts.port or DEFAULT_PORTS.get(parts.scheme)
+    except ValueError:
+        return None
+    return (parts.scheme, parts.hostname, port)
+
+def same_origin(url, origin):
+    return origin is not None and url_origin(url) == origin
+
+async def crawl_async(session, start_url, concurrency, max_depth, max_pages, on_page, on_error=None):
+    """
+    Crawls from `start_url` with at most `concurrency` pages in flight. Same-origin links (and redirects) found on a
+    page are added to a deduplicated FIFO frontier, down to `max_depth` links away from `start_url` and up to
+    `max_pages` pages in total. `on_page(page, depth, collector)` is called for every fetched page and
+    `on_error(page_url, exc)` for request errors.
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    start_url = urldefrag(start_url)[0]
+    origin = url_origin(start_url)
+    frontier = deque([(start_url, 0)])
+    seen = CompactHashSet()
+    seen.add(start_url)
+    scheduled = 1
+    active = 0
+    changed = asyncio.Condition()
+
+    def enqueue(links, depth):
+        nonlocal scheduled
+        for link in links:
+            if scheduled >= max_pages:
+                return
+            if same_origin(link, origin) and seen.add(link):
+                frontier.append((link, depth))
+                scheduled += 1
+
+    async def crawler():
+        nonlocal active
+        while True:
+            async with changed:
+                # Idle crawlers wait for new links; once nothing is queued or in flight, the crawl is over
+                await changed.wait_for(lambda: frontier or not active)
+                if not frontier:
+                    return
+                page_url, depth = frontier.popleft()
+                active += 1
+            try:
+                await ratelimit.wait_async()
+                page, collector = await loop.run_in_executor(executor, fetch_page, session, page_url)
+                on_page(page, depth, collector)
+                if depth < max_depth:
+                    enqueue(([page['redirect']] if page.get('redirect') else []) + (collector.links if collector else []),
+                            depth + 1)
+            except requests.exceptions.RequestException as req_e:
+                profiler.error(req_e)
+                if on_error:
+                    on_error(page_url, req_e)
+            finally:
+                async with changed:
+                    active -= 1
+                    changed.notify_all()
+
+    try:
+        await asyncio.gather(*(crawler() for _ in range(max(1, concurrency))))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def crawl_site(url, concurrency, max_depth, max_pages, verbose, sink, console):
+    """
+    Crawls `url` (see crawl_async) and emits what it finds to `sink`: every page as 'crawl_pages', and the forms,
+    script sources and comments found on them (each deduplicated across the site) as 'crawl_forms',
+    'crawl_scripts' and 'crawl_comments'.
+    """
+    console.print(f"\n[bold yellow]Crawling {url} (depth {max_depth}, up to {max_pages} pages)...[/bold yellow]")
+    for section in ('crawl_pages', 'crawl_forms', 'crawl_scripts', 'crawl_comments'):
+        sink.section(section)
+    session = build_session(concurrency)
+    seen = CompactHashSet()
+    pages = 0
+
+    def on_page(page, depth, collector):
+        nonlocal pages
+        pages += 1
+        page['depth'] = depth
+        progress.update(crawl_task, advance=1)
+        title = f" [cyan]{escape(page['title'])}[/cyan]" if page.get('title') else ""
+        reporter.hit(f"    [green]{page['status_code']} {page['url']}[/green]{title}", {'module': 'webscan', 'crawl': 'page', **page})
+        sink.emit('crawl_pages', page)
+        if collector is None:
+            return
+        for form in collector.forms:
+            key = f"form {form['method']} {form['action']} {' '.join(field['name'] for field in form['inputs'])}"
+            if seen.add(key):
+                form = {'page': page['url'], **form}
+                fields = escape(', '.join(field['name'] for field in form['inputs']))
+                reporter.hit(f"      [magenta]Form {form['method']} {form['action']} ({fields})[/magenta]",
+                             {'module': 'webscan', 'crawl': 'form', **form})
+                sink.emit('crawl_forms', form)
+        for src in collector.scripts:
+            if seen.add(f"script {src}"):
+                sink.emit('crawl_scripts', {'page': page['url'], 'src': src})
+        for comment in collector.comments:
+            if seen.add(f"comment {comment}"):
+                reporter.hit(f"      [dim]Comment: {escape(comment)}[/dim]", {'module': 'webscan', 'crawl': 'comment', 'page': page['url'], 'comment': comment})
+                sink.emit('crawl_comments', {'page': page['url'], 'comment': comment})
+
+    def on_error(page_url, req_e):
+        progress.update(crawl_task, advance=1)
+        reporter.error(f"[dim]    Error crawling {page_url}: {req_e}[/dim]")
+
+    try:
+        with make_progress(
+            console,
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            TextColumn("{task.completed} pages")
+        ) as progress, Reporter(console, verbose) as reporter:
+            crawl_task = progress.add_task(f"[cyan]Crawling ({concurrency} concurrent)...", total=max_pages)
+            with profiler.span('webscan: crawl', url=url):
+                asyncio.run(crawl_async(session, url, concurrency, max_depth, max_pages, on_page, on_error))
+            progress.update(crawl_task, description="[green]Crawl complete![/green]")
+    finally:
+        session.close()
+    console.print(f"[dim]Crawled {pages} pages.[/dim]")
+
+def directory_url(test_url, summary):
+    """
+    Returns the directory URL a hit reveals (a path ending in '/' or a redirect to the same path plus '/'),
+    or None if the hit is not a directory worth descending into.
+    """
+    if summary['status_code'] not in DIRECTORY_PRIORITY:
+        return None
+    if test_url.endswith('/'):
+        return test_url
+    redirect = summary.get('redirect')
+    if redirect and urljoin(test_url, redirect) == test_url + '/':
+        return test_url + '/'
+    return None
+
+def report_throttled(urls, verbose, console, limit=10):
+    """
+    Warns about probes that were still answered 429/503 after every retry, listing the first `limit` (all if verbose).
+    """
+    console.print(f"[bold yellow]{len(urls)} paths were still throttled (429/503) after {THROTTLE_RETRIES} retries "
+                  f"and could not be checked:[/bold yellow]")
+    shown = urls if verbose else urls[:limit]
+    for test_url in shown:
+        console.print(f"    [yellow]{escape(test_url)}[/yellow]")
+    if len(urls) > len(shown):
+        console.print(f"    [dim]... and {len(urls) - len(shown)} more (-v lists them all).[/dim]")
+
+def frontier_score(status_code, depth):
+    """
+    Frontier priority (lower is scanned first): shallow directories first, and at equal depth
+    readable directories before redirects and redirects before access-denied ones.
+    """
+    return depth * 10 + DIRECTORY_PRIORITY.get(status_code, 9)
+
+def rate_label(rate):
+    """
+    Live request rate shown next to the progress bar.
+    """
+    return f"{rate.rate:.0f} req/s" if rate else ""
+
+def brute_force_dirs(url, wordlist_path, concurrency, resume_file, verbose, sink, console, cache=None, auto_calibrate=True,
+                     max_depth=0, max_requests=None, adaptive=True, mutations=None, engine='requests'):
+    """
+    Brute-forces directories under `url`, emitting every hit to `sink` as 'dir_brute_results'.
+    Unless disabled, the server's answer for non-existent paths is calibrated first and matching responses are dropped.
+    With `max_depth` > 0, discovered directories are pushed onto a priority frontier and brute-forced in turn with the
+    same wordlist, down to `max_depth` levels below `url`. `max_requests` is a hard cap on requests for the whole run.
+    With `adaptive`, the request rate is tuned by an AIMD controller and shown live in the progress bar.
+    `mutations` (keyword arguments for utils.wordlist.Expansion: extensions, cases, suffixes, backups) expands
+    every wordlist entry lazily into its variants.
+    `engine` picks the HTTP client for the probes: 'requests', or 'fast' for the pipelined raw-socket client.
+    Probes answered 429/503 are not misses: they are retried (see retry_throttled) and reported if they never get through.
+    """
+    console.print(f"\n[bold yellow]Starting Directory Brute-forcing with {wordlist_path}...[/bold yellow]")
+    if not os.path.exists(wordlist_path):
+        console.print(f"[bold red]Error: Wordlist not found at {wordlist_path}[/bold red]")
+        return
+
+    sink.section('dir_brute_results')
+    wordlist = Wordlist(wordlist_path)
+    if mutations:
+        wordlist = Expansion(wordlist, **mutations)
+        console.print(f"[dim]Expanding {len(wordlist.wordlist)} words into {len(wordlist)} candidates per directory.[/dim]")
+    session = build_session(concurrency)
+    frontier = []
+    visited = CompactHashSet()
+    sequence = itertools.count()
+    requests_left = max_requests
+    filtered = 0
+    unresolved = []
+    rate = ratelimit.AdaptiveRate(initial=concurrency * 5) if adaptive else None
+
+    def push(dir_url, depth, status_code):
+        if depth > max_depth or dir_url in visited:
+            return
+        visited.add(dir_url)
+        heapq.heappush(frontier, (frontier_score(status_code, depth), next(sequence), dir_url, depth))
+
+    checkpoint = None
+    if resume_file:
+        checkpoint = Checkpoint(resume_file, 'webscan', url, hit_key=lambda hit: hit['url'])
+        if checkpoint.resumed:
+            for hit in checkpoint.hits:
+                sink.emit('dir_brute_results', hit)
+                dir_url = directory_url(hit['url'], hit)
+                if dir_url:
+                    push(dir_url, 1, hit['status_code'])
+            console.print(f"[dim]Resuming from {resume_file}: {checkpoint.completed} entries done, {len(checkpoint.hits)} hits restored.[/dim]")
+
+    def scan_directory(base, depth, progress, reporter):
+        nonlocal requests_left
+        # The resume state file only tracks the top-level pass
+        level_checkpoint = checkpoint if depth == 0 else None
+        entries = level_checkpoint.pending(wordlist) if level_checkpoint else wordlist
+        total = len(wordlist)
+
+        baselines = []
+        # A level the resume state already finished sends nothing, so it needs no baseline either
+        needs_calibration = auto_calibrate and not (level_checkpoint and level_checkpoint.completed >= total)
+        if needs_calibration and requests_left is not None and requests_left < len(CALIBRATION_SAMPLES):
+            console.print(f"[yellow]Request budget too small to calibrate {base}; soft-404 filtering is off there.[/yellow]")
+        elif needs_calibration:
+            with profiler.span('webscan: calibration', url=base):
+                baselines = calibrate(session, base)
+            if requests_left is not None:
+                requests_left -= len(CALIBRATION_SAMPLES)
+            for baseline in baselines:
+                if baseline['status_code'] != 404:
+                    console.print(
+                        f"[yellow]Soft-404 baseline for {base}: status {baseline['status_code']}, "
+                        f"sizes {sorted(baseline['sizes'])}, words {sorted(w for w in baseline['words'] if w is not None)}. "
+                        f"Matching responses will be dropped.[/yellow]"
+                    )
+        if requests_left is not None:
+            allowed = max(0, requests_left)
+            entries = itertools.islice(entries, allowed)
+            total = min(total, allowed + (level_checkpoint.completed if level_checkpoint else 0))
+
+        # Entries answered 429/503 in the current pass, left unfinished until a retry gets through (a dict keeps their order)
+        throttled = {}
+
+        def on_result(entry, test_url, summary):
+            nonlocal filtered
+            if summary['status_code'] in BACKOFF_STATUSES:
+                throttled[entry] = None
+                return
+            if summary['status_code'] in [404]: # Filter out common "Not Found"
+                reporter.miss()
+                return
+            if matches_baseline(summary, baselines, entry):
+                filtered += 1
+                reporter.miss()
+                return
+            hit = dir_hit(test_url, summary)
+            if level_checkpoint and not level_checkpoint.add_hit(hit):
+                # Already found before the crash and restored from the state file
+                return
+            reporter.hit(f"    [green]Found {test_url} (Status: {summary['status_code']})[/green]", {'module': 'webscan', **hit})
+            sink.emit('dir_brute_results', hit)
+            dir_url = directory_url(test_url, summary)
+            if dir_url:
+                push(dir_url, depth + 1, summary['status_code'])
+
+        def on_done(entry):
+            if entry in throttled:
+                return
+            progress.update(dir_task, advance=1, rate=rate_label(rate))
+            if level_checkpoint:
+                level_checkpoint.mark_done(entry)
+
+        def on_error(test_url, req_e):
+            reporter.error(f"[dim]    Error accessing {test_url}: {req_e}[/dim]")
+
+        def on_request():
+            # Charged per request actually sent (retries included, cache hits not); refused once the budget is spent
+            nonlocal requests_left
+            if requests_left <= 0:
+                return False
+            requests_left -= 1
+            return True
+
+        label = "directories" if depth == 0 else f"{base} (depth {depth})"
+        mode = f"{concurrency} connections x {PIPELINE_DEPTH} pipelined" if engine == 'fast' else f"{concurrency} concurrent"
+        dir_task = progress.add_task(
+            f"[cyan]Brute-forcing {label} ({mode})...",
+            total=total, completed=level_checkpoint.completed if level_checkpoint else 0, rate=rate_label(rate)
+        )
+        try:
+            with profiler.span('webscan: directory brute-force', url=base, depth=depth, engine=engine):
+                budget = on_request if requests_left is not None else None
+
+                def run_pass(batch):
+                    if engine == 'fast':
+                        return dir_brute_fast(base, batch, concurrency, on_result, on_error, on_done, cache, baselines, rate,
+                                              on_request=budget)
+                    return dir_brute_async(session, base, batch, concurrency, on_result, on_error, on_done, cache,
+                                           baselines, rate, budget)
+
+                asyncio.run(retry_throttled(run_pass, entries, throttled,
+                                            can_retry=lambda: requests_left is None or requests_left > 0))
+        finally:
+            if level_checkpoint:
+                level_checkpoint.close()
+        if throttled:
+            # Still throttled after every retry: reported at the end, and left unfinished in the resume state
+            unresolved.extend(urljoin(base, entry) for entry in throttled)
+            progress.update(dir_task, advance=len(throttled))
+        progress.update(dir_task, description=f"[green]Brute-forcing {label} complete![/green]")
+
+    push(url, 0, 200)
+    try:
+        with make_progress(
+            console,
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            TextColumn("[magenta]{task.fields[rate]}")
+        ) as progress, Reporter(console, verbose) as reporter:
+            while frontier:
+                if requests_left is not None and requests_left <= 0:
+                    console.print(f"[yellow]Request budget of {max_requests} exhausted, {len(frontier)} directories left unscanned.[/yellow]")
+                    break
+                _, _, base, depth = heapq.heappop(frontier)
+                scan_directory(base, depth, progress, reporter)
+    finally:
+        session.close()
+    if filtered:
+        console.print(f"[dim]Dropped {filtered} responses matching the soft-404 baseline.[/dim]")
+    if unresolved:
+        report_throttled(unresolved, verbose, console)
+    if rate:
+        console.print(f"[dim]Adaptive rate ended at {rate.rate:.0f} req/s (peak {rate.peak:.0f}, {rate.backoffs} back-offs).[/dim]")
+
+def run_scan(target, url, dir_brute, wordlist_path, verbose, output_file, console, concurrency=DEFAULT_CONCURRENCY,
+             resume_file=None, legacy_json=False, cache=None, auto_calibrate=True, max_depth=0, max_requests=None,
+             adaptive=True, mutations=None, engine='requests', crawl=False, crawl_depth=DEFAULT_CRAWL_DEPTH,
+             max_pages=DEFAULT_MAX_PAGES):
+    """
+    Performs web enumeration on the target and returns the results dict.
+    Brute-force probes are served from `cache` (a utils.cache.ResultCache) when given.
+    With `crawl`, the site is crawled from `url` (see crawl_site) before any directory brute-forcing.
     """
     if not url:
         # Try common HTTP/S ports if no URL is explicitly provided
@@ -36,6 +820,7 @@ def run_scan(target, url, dir_brute, wordlist_path, verbose, output_file, consol
 
     console.print(f"[blue]Starting Web Scan on {url}...[/blue]")
     web_results = {'url': url}
+    sink = output_formatter.open_sink(output_file, console, legacy_json)
 
     try:
         with Progress(
@@ -45,7 +830,8 @@ def run_scan(target, url, dir_brute, wordlist_path, verbose, output_file, consol
             transient=True
         ) as progress:
             task = progress.add_task("[cyan]Fetching main page...", total=None)
-            response = requests.get(url, timeout=10)
+            with profiler.span('webscan: main page fetch', url=url):
+                response = requests.get(url, timeout=10)
             progress.update(task, description="[green]Main page fetched![/green]")
 
         web_results['status_code'] = response.status_code
@@ -59,7 +845,8 @@ def run_scan(target, url, dir_brute, wordlist_path, verbose, output_file, consol
         for header, value in response.headers.items():
             console.print(f"      [dim]{header}: {value}[/dim]")
 
-        soup = BeautifulSoup(response.text, 'lxml')
+        with profiler.span('webscan: html parse'):
+            soup = BeautifulSoup(response.text, 'lxml')
         title = soup.title.string if soup.title else "No Title"
         web_results['title'] = title
         console.print(f"    Title: [cyan]{title}[/cyan]")
@@ -72,49 +859,24 @@ def run_scan(target, url, dir_brute, wordlist_path, verbose, output_file, consol
             for comment in comments:
                 console.print(f"      [dim]- {str(comment).strip()}[/dim]")
 
+        if crawl:
+            crawl_site(url, concurrency, crawl_depth, max_pages, verbose, sink, console)
+
         # Directory Brute-forcing
         if dir_brute:
-            console.print(f"\n[bold yellow]Starting Directory Brute-forcing with {wordlist_path}...[/bold yellow]")
-            if not os.path.exists(wordlist_path):
-                console.print(f"[bold red]Error: Wordlist not found at {wordlist_path}[/bold red]")
-                return
-
-            web_results['dir_brute_results'] = []
-            with open(wordlist_path, 'r') as f:
-                wordlist = [line.strip() for line in f if line.strip()]
-
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-                console=console,
-                transient=False
-            ) as progress:
-                dir_task = progress.add_task("[cyan]Brute-forcing directories...", total=len(wordlist))
-                for entry in wordlist:
-                    test_url = urljoin(url, entry)
-                    try:
-                        dir_response = requests.get(test_url, timeout=5)
-                        if dir_response.status_code not in [404]: # Filter out common "Not Found"
-                            console.print(f"    [green]Found {test_url} (Status: {dir_response.status_code})[/green]")
-                            web_results['dir_brute_results'].append({
-                                'url': test_url,
-                                'status_code': dir_response.status_code,
-                                'content_length': len(dir_response.content)
-                            })
-                    except requests.exceptions.RequestException as req_e:
-                        if verbose:
-                            console.print(f"[dim]    Error accessing {test_url}: {req_e}[/dim]")
-                    progress.update(dir_task, advance=1)
-                progress.update(dir_task, description="[green]Directory brute-forcing complete![/green]")
-
-        if output_file:
-            output_formatter.save_results(output_file, web_results, console)
+            brute_force_dirs(url, wordlist_path, concurrency, resume_file, verbose, sink, console, cache, auto_calibrate,
+                             max_depth, max_requests, adaptive, mutations, engine)
 
     except requests.exceptions.RequestException as e:
+        profiler.error(e)
         console.print(f"[bold red]Web Scan Error: {e}[/bold red]")
     except Exception as e:
+        profiler.error(e)
         console.print(f"[bold red]An unexpected error occurred during web scan: {e}[/bold red]")
+    finally:
+        # Whatever was found so far is saved even if the scan was interrupted
+        web_results = sink.close(web_results)
+    return web_results
 
 # To extract comments from HTML
 from bs4 import Comment
@@ -0,0 +1,88 @@
+# utils/cache.py
+
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_TTL = 3600
+NEGATIVE_TTL = 300
+COMMIT_EVERY = 500
+MISS = object()
+
+def default_cache_path():
+    """
+    ~/.cache/reconor/cache.sqlite3, honouring XDG_CACHE_HOME.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'reconor', 'cache.sqlite3')
+
+def cache_enabled(use_cache, no_cache, refresh):
+    """
+    The cache is opt-in: --cache or RECONOR_CACHE=1 turns it on, --refresh implies it and --no-cache always wins.
+    """
+    if no_cache:
+        return False
+    return bool(use_cache or refresh or os.environ.get('RECONOR_CACHE') == '1')
+
+class ResultCache:
+    """
+    Persistent (module, target, query) -> JSON value cache with per-entry expiry, stored in SQLite.
+    With `refresh`, lookups always miss but fresh answers are still written back.
+    Keeps hit/miss counters for the run summary.
+    """
+    def __init__(self, path=None, refresh=False, default_ttl=DEFAULT_TTL):
+        self.path = path or default_cache_path()
+        self.refresh = refresh
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "module TEXT, target TEXT, query TEXT, value TEXT, expires REAL, "
+            "PRIMARY KEY (module, target, query)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def get(self, module, target, query):
+        """
+        Returns the cached value, or MISS if it is unknown, expired or --refresh is active.
+        """
+        if self.refresh:
+            self.misses += 1
+            return MISS
+        row = self._db.execute(
+            "SELECT value, expires FROM cache WHERE module = ? AND target = ? AND query = ?",
+            (module, target, query)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            self.misses += 1
+            return MISS
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, module, target, query, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._db.execute(
+            "INSERT OR REPLACE INTO cache (module, target, query, value, expires) VALUES (?, ?, ?, ?, ?)",
+            (module, target, query, json.dumps(value), time.time() + ttl)
+        )
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+
+    def purge_expired(self):
+        self._db.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+        self._db.commit()
+
+    def close(self):
+        self.purge_expired()
+        self._db.close()
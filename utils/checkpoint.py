@@ -0,0 +1,133 @@
+# utils/checkpoint.py
+
+import json
+import os
+import time
+from collections import deque
+
+DEFAULT_INTERVAL = 2.0
+
+class Checkpoint:
+    """
+    Append-only JSON-lines state file for resumable brute-force runs.
+    Hits are appended as they are found; every `interval` seconds a checkpoint line records the
+    wordlist offset reached and the entries still in flight. Everything before `offset` that is not
+    in flight is done, so a restarted run only re-does the in-flight entries and what comes after.
+    A torn trailing line from a crash is ignored on load. `hits` holds the hits loaded from earlier runs.
+    `hit_key(result)` identifies a finding (default: the whole record), so add_hit() can drop repeats.
+    """
+    def __init__(self, path, module, target, interval=DEFAULT_INTERVAL, hit_key=None):
+        self.path = path
+        self.interval = interval
+        self.hit_key = hit_key or (lambda result: json.dumps(result, sort_keys=True))
+        self.offset = 0
+        self.hits = []
+        self._hit_keys = set()
+        self._in_flight = {}
+        self._pending_indexes = set()
+        self._torn_tail = False
+        self._last_flush = time.monotonic()
+
+        header = {'type': 'start', 'module': module, 'target': target}
+        if os.path.exists(path):
+            self._load(header)
+        output_dir = os.path.dirname(path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        self._file = open(path, 'a')
+        if self._torn_tail:
+            self._file.write('\n')
+        if not self.resumed:
+            self._write(header)
+            self._flush()
+
+    @property
+    def resumed(self):
+        return self.offset > 0 or bool(self.hits)
+
+    @property
+    def completed(self):
+        """
+        Number of entries already finished by earlier runs.
+        """
+        return self.offset - len(self._pending_indexes)
+
+    def _load(self, header):
+        with open(self.path, 'r') as f:
+            for line in f:
+                self._torn_tail = not line.endswith('\n')
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('type') == 'start':
+                    if record.get('module') != header['module'] or record.get('target') != header['target']:
+                        raise ValueError(
+                            f"State file {self.path} belongs to {record.get('module')} on {record.get('target')}, "
+                            f"not {header['module']} on {header['target']}"
+                        )
+                elif record.get('type') == 'hit':
+                    if self._note_hit(record['result']):
+                        self.hits.append(record['result'])
+                elif record.get('type') == 'checkpoint':
+                    self.offset = record['offset']
+                    self._pending_indexes = set(record['in_flight'])
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+
+    def _flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def pending(self, entries):
+        """
+        Yields the entries of `entries` that still need doing, remembering each as in flight
+        until mark_done() is called for it. An entry that occurs more than once is in flight once per occurrence,
+        so every index it was yielded at gets finished.
+        """
+        for index, entry in enumerate(entries):
+            if index < self.offset and index not in self._pending_indexes:
+                continue
+            self._in_flight.setdefault(entry, deque()).append(index)
+            self._pending_indexes.add(index)
+            self.offset = max(self.offset, index + 1)
+            yield entry
+
+    def mark_done(self, entry):
+        indexes = self._in_flight.get(entry)
+        if indexes:
+            self._pending_indexes.discard(indexes.popleft())
+            if not indexes:
+                del self._in_flight[entry]
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.save()
+
+    def _note_hit(self, result):
+        key = self.hit_key(result)
+        if key in self._hit_keys:
+            return False
+        self._hit_keys.add(key)
+        return True
+
+    def add_hit(self, result):
+        """
+        Records `result` and returns True, or returns False if it is already recorded: entries that were in flight
+        at a crash run again on resume and find their hits a second time.
+        """
+        if not self._note_hit(result):
+            return False
+        self._write({'type': 'hit', 'result': result})
+        return True
+
+    def save(self):
+        """
+        Appends a checkpoint line and flushes everything written so far to disk.
+        """
+        self._write({'type': 'checkpoint', 'offset': self.offset, 'in_flight': sorted(self._pending_indexes)})
+        self._flush()
+
+    def close(self):
+        self.save()
+        self._file.close()
@@ -0,0 +1,22 @@
+# utils/concurrency.py
+
+import asyncio
+
+async def run_bounded(items, worker, concurrency):
+    """
+    Runs the coroutine function `worker` over every element of `items`,
+    keeping at most `concurrency` calls in flight at any time.
+    Items are pulled lazily from a shared iterator, so large wordlists are never copied.
+    """
+    iterator = iter(items)
+
+    async def drain():
+        for item in iterator:
+            await worker(item)
+
+    tasks = [asyncio.ensure_future(drain()) for _ in range(max(1, concurrency))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,209 @@
+# utils/htmlstream.py
+
+import codecs
+import itertools
+import re
+from urllib.parse import urljoin, urldefrag, urlsplit
+
+from lxml import etree
+
+MAX_LINKS = 1000
+MAX_FORMS = 50
+MAX_FORM_INPUTS = 100
+MAX_SCRIPTS = 200
+MAX_COMMENTS = 100
+MAX_TEXT = 1024
+# libxml2's HTML push parser keeps everything fed to it until close(), so pages are parsed in segments of about this size
+SEGMENT_BYTES = 1024 * 1024
+# Elements whose attribute points at another page worth crawling
+LINK_ATTRIBUTES = {'a': 'href', 'area': 'href', 'frame': 'src', 'iframe': 'src'}
+FORM_FIELDS = ('input', 'select', 'textarea', 'button')
+# A <meta charset> or http-equiv Content-Type declaration, looked for in the first chunk of the page
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9._:-]+)', re.IGNORECASE)
+# Used when neither the headers nor the page name a charset
+DEFAULT_ENCODING = 'utf-8'
+
+def known_encoding(name):
+    """
+    The codec name for charset `name`, or None if Python does not know it (lxml would refuse it).
+    """
+    try:
+        return codecs.lookup(name.strip().strip('"\'')).name if name else None
+    except LookupError:
+        return None
+
+def sniff_charset(head):
+    """
+    The charset a page declares in a <meta> tag within `head` (its first bytes), or None.
+    """
+    match = META_CHARSET.search(head)
+    return known_encoding(match.group(1).decode('ascii')) if match else None
+
+def absolute_url(base, value):
+    """
+    Resolves `value` against `base` and drops the fragment; None for non-HTTP links (mailto:, javascript:, ...).
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    url = urldefrag(urljoin(base, value))[0]
+    return url if urlsplit(url).scheme in ('http', 'https') else None
+
+class PageCollector:
+    """
+    lxml parser target that pulls links, forms, script sources, comments and the title out of an HTML page
+    while it is being fed, without ever building a tree. Every list is capped (MAX_LINKS, MAX_FORMS, ...) and
+    every string cut at MAX_TEXT, so memory stays bounded however large the page is. Links are absolute,
+    resolved against the page URL or its <base href>, and deduplicated.
+    """
+    def __init__(self, page_url):
+        self.base = page_url
+        self.title = None
+        self.links = []
+        self.forms = []
+        self.scripts = []
+        self.comments = []
+        self._seen_links = set()
+        self._form = None
+        self._in_title = False
+        self._title_parts = []
+
+    def _add_link(self, value):
+        url = absolute_url(self.base, value)
+        if url and url not in self._seen_links and len(self.links) < MAX_LINKS:
+            self._seen_links.add(url)
+            self.links.append(url)
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        if tag in LINK_ATTRIBUTES:
+            self._add_link(attrib.get(LINK_ATTRIBUTES[tag]))
+        elif tag == 'base' and attrib.get('href'):
+            self.base = urljoin(self.base, attrib['href'])
+        elif tag == 'script' and attrib.get('src'):
+            src = absolute_url(self.base, attrib['src'])
+            if src and src not in self.scripts and len(self.scripts) < MAX_SCRIPTS:
+                self.scripts.append(src)
+        elif tag == 'title' and self.title is None:
+            self._in_title = True
+        elif tag == 'form':
+            self._close_form()
+            action = absolute_url(self.base, attrib.get('action')) or urldefrag(self.base)[0]
+            self._form = {'action': action, 'method': (attrib.get('method') or 'GET').upper(), 'inputs': []}
+        elif tag in FORM_FIELDS and self._form is not None and attrib.get('name'):
+            if len(self._form['inputs']) < MAX_FORM_INPUTS:
+                field_type = attrib.get('type') or ('text' if tag == 'input' else tag)
+                self._form['inputs'].append({'name': attrib['name'][:MAX_TEXT], 'type': field_type.lower()[:MAX_TEXT]})
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self.title = ' '.join(''.join(self._title_parts).split())[:MAX_TEXT]
+            self._title_parts = []
+        elif tag == 'form':
+            self._close_form()
+
+    def data(self, text):
+        if self._in_title and sum(map(len, self._title_parts)) < MAX_TEXT:
+            self._title_parts.append(text)
+
+    def comment(self, text):
+        text = text.strip()
+        if text and len(self.comments) < MAX_COMMENTS:
+            self.comments.append(text[:MAX_TEXT])
+
+    def segment_break(self):
+        """
+        Called when the parser is replaced mid-page: an open <title> is finished, since the next parser will
+        drop its end tag. An open form stays open and keeps collecting fields.
+        """
+        if self._in_title:
+            self.end('title')
+
+    def _close_form(self):
+        if self._form is not None:
+            if len(self.forms) < MAX_FORMS:
+                self.forms.append(self._form)
+                if self._form['method'] == 'GET':
+                    self._add_link(self._form['action'])
+            self._form = None
+
+    def close(self):
+        self._close_form()
+        if self._in_title:
+            self.end('title')
+        return self
+
+class _Segment:
+    """
+    Parser target for one segment of a page: forwards events to the page's collector, except the end tags lxml
+    makes up for still-open elements when the segment's parser is closed.
+    """
+    def __init__(self, collector):
+        self.collector = collector
+        self.closing = False
+
+    def start(self, tag, attrib):
+        if not self.closing:
+            self.collector.start(tag, attrib)
+
+    def end(self, tag):
+        if not self.closing:
+            self.collector.end(tag)
+
+    def data(self, text):
+        if not self.closing:
+            self.collector.data(text)
+
+    def comment(self, text):
+        if not self.closing:
+            self.collector.comment(text)
+
+    def close(self):
+        return self.collector
+
+def _segment_parser(collector, encoding):
+    segment = _Segment(collector)
+    return segment, etree.HTMLParser(target=segment, recover=True, no_network=True, encoding=encoding)
+
+def _close_segment(segment, parser):
+    segment.closing = True
+    try:
+        parser.close()
+    except etree.LxmlError:
+        pass
+
+def parse_chunks(page_url, chunks, encoding=None):
+    """
+    Feeds an HTML body to an incremental lxml parser chunk by chunk, as `chunks` yields them, and returns the
+    PageCollector. Broken markup is recovered from; an empty or unparseable body just yields an empty collector.
+    Since libxml2 holds on to its input until the parser is closed, the parser is replaced at the first tag
+    boundary after every SEGMENT_BYTES, keeping memory flat for multi-MB pages; the collector carries over.
+    Later segments never see the page's <meta>, so the charset is settled up front for all of them: `encoding`
+    (from the Content-Type header), else a <meta> charset in the first chunk, else DEFAULT_ENCODING.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, b'')
+    encoding = known_encoding(encoding) or sniff_charset(first) or DEFAULT_ENCODING
+    collector = PageCollector(page_url)
+    segment, parser = _segment_parser(collector, encoding)
+    fed = 0
+    try:
+        for chunk in itertools.chain([first], chunks):
+            cut = chunk.rfind(b'<') if fed + len(chunk) >= SEGMENT_BYTES else -1
+            if cut < 0:
+                parser.feed(chunk)
+                fed += len(chunk)
+                continue
+            if cut:
+                parser.feed(chunk[:cut])
+            _close_segment(segment, parser)
+            collector.segment_break()
+            segment, parser = _segment_parser(collector, encoding)
+            parser.feed(chunk[cut:])
+            fed = len(chunk) - cut
+    except etree.LxmlError:
+        pass
+    _close_segment(segment, parser)
+    return collector.close()
@@ -0,0 +1,253 @@
+# utils/httpclient.py
+
+import asyncio
+import ssl
+from collections import deque
+
+DEFAULT_TIMEOUT = 5.0
+MAX_BODY_BYTES = 64 * 1024
+READ_CHUNK = 64 * 1024
+USER_AGENT = "reconor"
+# Header lines read_probe() looks at; every other header is skipped without being decoded
+PROBE_HEADERS = {b'content-length', b'location', b'transfer-encoding', b'connection'}
+
+class ResponseError(Exception):
+    """
+    The server sent something that is not a parseable HTTP/1.x response.
+    """
+
+class Response:
+    """
+    A parsed response. `headers` has lower-cased names; `body` holds at most the first `max_body` bytes,
+    although the whole body was consumed from the connection.
+    """
+    def __init__(self, status, headers, body, keep_alive):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+
+def insecure_context():
+    """
+    TLS context for scanning: no certificate or hostname verification, since targets are addressed by IP
+    and probed under names their certificates will not cover.
+    """
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+def build_request(method, path, host, headers=None):
+    """
+    Serialises one HTTP/1.1 request (without a body) to bytes, ready to be written as-is.
+    """
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", f"User-Agent: {USER_AGENT}", "Accept: */*"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+def request_suffix(host, headers=None):
+    """
+    Everything of a GET request after the path, pre-built once per target:
+    b'GET ' + path + request_suffix(host) is a complete request.
+    """
+    lines = [" HTTP/1.1", f"Host: {host}", f"User-Agent: {USER_AGENT}", "Accept: */*"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+async def open_connection(host, port, ssl_context=None, server_name=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Opens a (reader, writer) stream pair, over TLS when `ssl_context` is given.
+    An empty or missing `server_name` sends no SNI at all.
+    """
+    if ssl_context is None:
+        return await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    return await asyncio.wait_for(
+        asyncio.open_connection(host, port, ssl=ssl_context, server_hostname=server_name or ''), timeout
+    )
+
+async def read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(b'', None)
+        if line in (b'\r\n', b'\n'):
+            return headers
+        name, sep, value = line.decode('latin-1').partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+
+async def read_body(reader, size, max_body):
+    """
+    Consumes exactly `size` bytes, keeping only the first `max_body` of them.
+    """
+    kept = []
+    kept_size = 0
+    while size > 0:
+        chunk = await reader.read(min(size, READ_CHUNK))
+        if not chunk:
+            raise asyncio.IncompleteReadError(b'', size)
+        size -= len(chunk)
+        if kept_size < max_body:
+            kept.append(chunk[:max_body - kept_size])
+            kept_size += len(kept[-1])
+    return b''.join(kept)
+
+async def read_chunked(reader, max_body):
+    body = b''
+    while True:
+        line = await reader.readline()
+        try:
+            size = int(line.split(b';', 1)[0].strip(), 16)
+        except ValueError:
+            raise ResponseError(f"malformed chunk size: {line[:40]!r}")
+        if size == 0:
+            await read_headers(reader)  # trailers
+            return body
+        body += await read_body(reader, size, max_body - len(body))
+        await reader.readexactly(2)
+
+async def read_response(reader, head=False, max_body=MAX_BODY_BYTES):
+    """
+    Reads one response from `reader`. The body is framed by Content-Length, chunked encoding or connection close;
+    interim 1xx responses are skipped. Raises ResponseError for garbage and IncompleteReadError if the peer hangs up.
+    """
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(b'', None)
+        parts = line.decode('latin-1').split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+            raise ResponseError(f"malformed status line: {line[:80]!r}")
+        version, status = parts[0], int(parts[1])
+        try:
+            headers = await read_headers(reader)
+        except ValueError:
+            raise ResponseError("header line too long")
+        if not 100 <= status < 200 or status == 101:
+            break
+    return await read_framed_body(reader, version, status, headers, head, max_body)
+
+async def read_framed_body(reader, version, status, headers, head, max_body):
+    """
+    Reads the body that follows the headers and returns the Response.
+    """
+    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    if head or status in (101, 204, 304):
+        body = b''
+    elif 'chunked' in headers.get('transfer-encoding', '').lower():
+        body = await read_chunked(reader, max_body)
+    elif headers.get('content-length', '').isdigit():
+        body = await read_body(reader, int(headers['content-length']), max_body)
+    else:
+        # Delimited by connection close: keep what fits and drop the connection
+        body = b''
+        while len(body) < max_body:
+            chunk = await reader.read(max_body - len(body))
+            if not chunk:
+                break
+            body += chunk
+        keep_alive = False
+    return Response(status, headers, body, keep_alive)
+
+async def read_probe(reader, max_body=MAX_BODY_BYTES):
+    """
+    Cut-down read_response() for brute-force probes: only the status line and the PROBE_HEADERS are parsed,
+    and the body is consumed as raw bytes (the first `max_body` kept) without any decoding.
+    """
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(b'', None)
+        version, _, rest = line.partition(b' ')
+        status = rest[:3]
+        if not version.startswith(b'HTTP/') or not status.isdigit():
+            raise ResponseError(f"malformed status line: {line[:80]!r}")
+        status = int(status)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            if line in (b'\r\n', b'\n'):
+                break
+            name, sep, value = line.partition(b':')
+            name = name.strip().lower()
+            if sep and name in PROBE_HEADERS:
+                headers[name.decode()] = value.strip().decode('latin-1')
+        if not 100 <= status < 200 or status == 101:
+            break
+    return await read_framed_body(reader, version.decode(), status, headers, False, max_body)
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connections to one address. Every request goes to the same host:port whatever
+    its Host header says, which is what virtual-host fuzzing needs. With `tls`, a request only reuses a connection
+    whose handshake used the same server name (SNI). At most `size` idle connections are kept; the least recently
+    used one is closed first. A request that fails on a reused connection (the server closed it while idle)
+    is retried once on a new one.
+    """
+    def __init__(self, host, port, tls=False, size=10, timeout=DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.ssl_context = insecure_context() if tls else None
+        self.size = size
+        self.timeout = timeout
+        self.opened = 0
+        self.requests = 0
+        self._idle = deque()
+
+    async def _open(self, server_name):
+        self.opened += 1
+        return await open_connection(self.host, self.port, self.ssl_context, server_name, self.timeout)
+
+    def _take(self, key):
+        for index in range(len(self._idle) - 1, -1, -1):
+            if self._idle[index][0] == key:
+                connection = self._idle[index][1]
+                del self._idle[index]
+                return connection
+        return None
+
+    def _release(self, key, connection):
+        self._idle.append((key, connection))
+        if len(self._idle) > self.size:
+            self._idle.popleft()[1][1].close()
+
+    async def _exchange(self, connection, raw, head, max_body):
+        reader, writer = connection
+        writer.write(raw)
+        await writer.drain()
+        return await read_response(reader, head, max_body)
+
+    async def request(self, raw, server_name=None, head=False, max_body=MAX_BODY_BYTES):
+        """
+        Sends the pre-built request bytes `raw` and returns its Response.
+        `server_name` is the SNI to use over TLS (ignored for plain HTTP).
+        """
+        key = server_name if self.ssl_context else None
+        self.requests += 1
+        while True:
+            connection = self._take(key)
+            reused = connection is not None
+            if not reused:
+                connection = await self._open(key)
+            try:
+                response = await asyncio.wait_for(self._exchange(connection, raw, head, max_body), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                connection[1].close()
+                if reused:
+                    continue
+                raise ConnectionResetError(f"connection closed by {self.host}:{self.port}") from e
+            except BaseException:
+                connection[1].close()
+                raise
+            if response.keep_alive:
+                self._release(key, connection)
+            else:
+                connection[1].close()
+            return response
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1][1].close()
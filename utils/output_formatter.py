@@ -1,35 +1,214 @@
 # utils/output_formatter.py
 
+import gzip
 import json
 import os
+import time
+
+from utils import profiler
+
+STREAM_EXTENSIONS = ('.jsonl', '.jsonl.gz', '.ndjson', '.ndjson.gz')
+FLUSH_INTERVAL = 1.0
+
+def is_stream_path(file_path):
+    """
+    True if `file_path` names a newline-delimited JSON output (optionally gzip-compressed).
+    """
+    return bool(file_path) and file_path.lower().endswith(STREAM_EXTENSIONS)
+
+def _ensure_dir(file_path):
+    output_dir = os.path.dirname(file_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+def _open_text(file_path, mode):
+    if file_path.lower().endswith('.gz'):
+        return gzip.open(file_path, mode + 't', compresslevel=6)
+    return open(file_path, mode)
+
+class MemorySink:
+    """
+    Result sink that keeps findings in memory and writes them with save_results() on close.
+    Used for .json/.txt output or no output at all, matching the original behaviour.
+    """
+    def __init__(self, file_path, console):
+        self.file_path = file_path
+        self.console = console
+        self.sections = {}
+
+    def section(self, name):
+        self.sections.setdefault(name, [])
+
+    def emit(self, name, record):
+        self.sections.setdefault(name, []).append(record)
+
+    def close(self, data):
+        """
+        Merges the collected sections into `data`, saves it if an output file was given and returns it.
+        """
+        data = dict(data)
+        data.update(self.sections)
+        if self.file_path:
+            save_results(self.file_path, data, self.console)
+        return data
+
+class StreamSink:
+    """
+    Result sink that writes every finding as one JSON line as soon as it is emitted, gzip-compressed if the
+    path ends in .gz. Writes are buffered and flushed at most every FLUSH_INTERVAL seconds, so memory stays flat
+    and a crash loses at most the last interval. Top-level fields passed to close() are appended last.
+    With `legacy_json`, the single indented JSON file is rebuilt from the stream on close.
+    """
+    def __init__(self, file_path, console, legacy_json=False):
+        self.file_path = file_path
+        self.console = console
+        self.legacy_json = legacy_json
+        self.count = 0
+        self._sections = {}
+        _ensure_dir(file_path)
+        self._file = _open_text(file_path, 'w')
+        self._last_flush = time.monotonic()
+
+    def _write(self, line):
+        self._file.write(json.dumps(line) + '\n')
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+    def section(self, name):
+        if name not in self._sections:
+            self._sections[name] = 0
+            self._write({'section': name})
+
+    def emit(self, name, record):
+        self.section(name)
+        self._write({'section': name, 'record': record})
+        self._sections[name] += 1
+        self.count += 1
+
+    def close(self, data):
+        """
+        Writes the top-level fields of `data`, closes the stream and returns `data` plus a 'streamed' entry,
+        {'file': path, 'sections': {section: record count}}, in place of the records themselves: they live only in
+        the file (read them back with read_stream()), so callers can tell a streamed result from an empty one.
+        """
+        try:
+            for key, value in data.items():
+                self._write({'key': key, 'value': value})
+        finally:
+            self._file.close()
+        self.console.print(f"[green]Results streamed to {self.file_path} ({self.count} records, JSONL).[/green]")
+        if self.legacy_json:
+            json_path = legacy_json_path(self.file_path)
+            with profiler.span('rebuild legacy json', file=json_path):
+                build_legacy_json(self.file_path, json_path)
+            self.console.print(f"[green]Legacy JSON rebuilt at {json_path}.[/green]")
+        return {**data, 'streamed': {'file': self.file_path, 'sections': dict(self._sections)}}
+
+def open_sink(file_path, console, legacy_json=False):
+    """
+    Returns the result sink for `file_path`: a StreamSink for .jsonl/.jsonl.gz paths, otherwise a MemorySink.
+    Modules call sink.emit(section, record) per finding and sink.close(top_level_fields) at the end, and return
+    what close() returns: the full results from a MemorySink, the top-level fields plus a 'streamed' summary
+    (file and per-section record counts) from a StreamSink.
+    """
+    if is_stream_path(file_path):
+        return StreamSink(file_path, console, legacy_json)
+    return MemorySink(file_path, console)
+
+def legacy_json_path(stream_path):
+    """
+    results.jsonl(.gz) -> results.json
+    """
+    lower = stream_path.lower()
+    for ext in STREAM_EXTENSIONS:
+        if lower.endswith(ext):
+            return stream_path[:-len(ext)] + '.json'
+    return stream_path + '.json'
+
+def read_stream(stream_path):
+    """
+    Yields the JSON lines of a result stream, stopping quietly at a torn or truncated tail.
+    """
+    with _open_text(stream_path, 'r') as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    return
+        except EOFError:
+            return
+
+def build_legacy_json(stream_path, json_path):
+    """
+    Rebuilds the single indented JSON document save_results() would have written from a result stream.
+    Top-level fields are collected first, then each section's records are copied over one pass per section,
+    so memory use does not depend on the number of records.
+    """
+    fields = {}
+    sections = []
+    for line in read_stream(stream_path):
+        if 'key' in line:
+            fields[line['key']] = line['value']
+        elif 'section' in line and line['section'] not in sections:
+            sections.append(line['section'])
+
+    _ensure_dir(json_path)
+    with open(json_path, 'w') as f:
+        f.write('{')
+        first = True
+        for key, value in fields.items():
+            f.write(('\n' if first else ',\n') + '    ' + json.dumps(key) + ': ' + _indent(json.dumps(value, indent=4), 4))
+            first = False
+        for name in sections:
+            f.write(('\n' if first else ',\n') + '    ' + json.dumps(name) + ': [')
+            first = False
+            first_record = True
+            for line in read_stream(stream_path):
+                if line.get('section') == name and 'record' in line:
+                    f.write(('\n' if first_record else ',\n') + '        ' + _indent(json.dumps(line['record'], indent=4), 8))
+                    first_record = False
+            f.write(']' if first_record else '\n    ]')
+        f.write('\n}' if not first else '}')
+
+def _indent(text, spaces):
+    return text.replace('\n', '\n' + ' ' * spaces)
 
 def save_results(file_path, data, console):
     """
     Saves the reconnaissance results to a specified file.
-    Supports JSON and plain text based on file extension.
-    """
-    try:
-        # Ensure the directory exists
-        output_dir = os.path.dirname(file_path)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-
-        if file_path.lower().endswith('.json'):
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=4)
-            console.print(f"[green]Results saved to {file_path} (JSON).[/green]")
-        elif file_path.lower().endswith('.txt'):
-            with open(file_path, 'w') as f:
-                f.write(json.dumps(data, indent=4)) # For simplicity, save JSON as text
-            console.print(f"[green]Results saved to {file_path} (TXT).[/green]")
-        else:
-            console.print(f"[yellow]Unsupported output file format for {file_path}. Saving as JSON by default.[/yellow]")
-            with open(f"{file_path}.json", 'w') as f:
-                json.dump(data, f, indent=4)
-            console.print(f"[green]Results saved to {file_path}.json (JSON).[/green]")
-
-    except Exception as e:
-        console.print(f"[bold red]Error saving results to {file_path}: {e}[/bold red]")
+    Supports JSON, plain text and JSON lines (optionally .gz) based on file extension.
+    """
+    with profiler.span('save results', file=file_path):
+        try:
+            # Ensure the directory exists
+            _ensure_dir(file_path)
+
+            if is_stream_path(file_path):
+                sink = StreamSink(file_path, console)
+                for key, value in data.items():
+                    if isinstance(value, list):
+                        sink.section(key)
+                        for record in value:
+                            sink.emit(key, record)
+                sink.close({key: value for key, value in data.items() if not isinstance(value, list)})
+            elif file_path.lower().endswith('.json'):
+                with open(file_path, 'w') as f:
+                    json.dump(data, f, indent=4)
+                console.print(f"[green]Results saved to {file_path} (JSON).[/green]")
+            elif file_path.lower().endswith('.txt'):
+                with open(file_path, 'w') as f:
+                    f.write(json.dumps(data, indent=4)) # For simplicity, save JSON as text
+                console.print(f"[green]Results saved to {file_path} (TXT).[/green]")
+            else:
+                console.print(f"[yellow]Unsupported output file format for {file_path}. Saving as JSON by default.[/yellow]")
+                with open(f"{file_path}.json", 'w') as f:
+                    json.dump(data, f, indent=4)
+                console.print(f"[green]Results saved to {file_path}.json (JSON).[/green]")
+
+        except Exception as e:
+            console.print(f"[bold red]Error saving results to {file_path}: {e}[/bold red]")
 
 # Example usage (for testing this module directly)
 if __name__ == "__main__":
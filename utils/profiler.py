@@ -0,0 +1,213 @@
+# utils/profiler.py
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from rich.table import Table
+
+# Upper bounds of the latency histogram buckets, in milliseconds (the last bucket is open-ended)
+BUCKET_BOUNDS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+class LatencyHistogram:
+    """
+    Fixed log-scale latency histogram: constant memory however many samples are recorded.
+    Percentiles are estimated as the upper bound of the bucket they fall in.
+    """
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        index = 0
+        while index < len(BUCKET_BOUNDS_MS) and ms > BUCKET_BOUNDS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def merge(self, other):
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                return min(BUCKET_BOUNDS_MS[index], self.max) if index < len(BUCKET_BOUNDS_MS) else self.max
+        return self.max
+
+class Profiler:
+    """
+    Collects timed spans, counters, per-host latency histograms and error counts for one process.
+    Snapshots from worker processes can be merged into the parent's profiler.
+    """
+    def __init__(self):
+        self.spans = []
+        self.counters = Counter()
+        self.errors = Counter()
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, args):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self.spans.append((name, start, end - start, os.getpid(), threading.get_ident(), args))
+
+    def count(self, name, value):
+        with self._lock:
+            self.counters[name] += value
+
+    def error(self, exc):
+        with self._lock:
+            self.errors[type(exc).__name__] += 1
+
+    def observe(self, metric, key, seconds):
+        with self._lock:
+            histogram = self.histograms.get((metric, key))
+            if histogram is None:
+                histogram = self.histograms[(metric, key)] = LatencyHistogram()
+            histogram.add(seconds * 1000)
+
+    def snapshot(self):
+        """
+        Picklable copy of everything collected, for returning from a pool worker.
+        """
+        with self._lock:
+            return {
+                'spans': list(self.spans),
+                'counters': dict(self.counters),
+                'errors': dict(self.errors),
+                'histograms': dict(self.histograms),
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            self.spans.extend(snapshot['spans'])
+            self.counters.update(snapshot['counters'])
+            self.errors.update(snapshot['errors'])
+            for key, histogram in snapshot['histograms'].items():
+                if key in self.histograms:
+                    self.histograms[key].merge(histogram)
+                else:
+                    self.histograms[key] = histogram
+
+    def print_summary(self, console):
+        phases = {}
+        for name, _, duration, _, _, _ in self.spans:
+            calls, total = phases.get(name, (0, 0.0))
+            phases[name] = (calls + 1, total + duration)
+        table = Table(title="Profile: Phases")
+        table.add_column("Phase", style="cyan")
+        table.add_column("Calls", justify="right")
+        table.add_column("Total (s)", justify="right")
+        table.add_column("Mean (ms)", justify="right")
+        for name, (calls, total) in sorted(phases.items(), key=lambda item: -item[1][1]):
+            table.add_row(name, str(calls), f"{total:.3f}", f"{total / calls * 1000:.1f}")
+        console.print(table)
+
+        if self.histograms:
+            table = Table(title="Profile: Request Latency")
+            table.add_column("Kind", style="cyan")
+            table.add_column("Host / Server", min_width=21)
+            table.add_column("Requests", justify="right")
+            table.add_column("Mean (ms)", justify="right")
+            table.add_column("p50 (ms)", justify="right")
+            table.add_column("p99 (ms)", justify="right")
+            table.add_column("Max (ms)", justify="right")
+            for (metric, key), histogram in sorted(self.histograms.items()):
+                table.add_row(
+                    metric, key, str(histogram.count), f"{histogram.total / histogram.count:.1f}",
+                    f"{histogram.percentile(0.50):.1f}", f"{histogram.percentile(0.99):.1f}", f"{histogram.max:.1f}"
+                )
+            console.print(table)
+
+        if self.counters or self.errors:
+            table = Table(title="Profile: Counters")
+            table.add_column("Counter", style="cyan")
+            table.add_column("Value", justify="right")
+            for name, value in sorted(self.counters.items()):
+                table.add_row(name, str(value))
+            for name, value in sorted(self.errors.items()):
+                table.add_row(f"[red]error: {name}[/red]", str(value))
+            console.print(table)
+
+    def write_trace(self, file_path):
+        """
+        Writes the spans as a Chrome trace (load it in chrome://tracing or Perfetto).
+        """
+        origin = min((start for _, start, _, _, _, _ in self.spans), default=0.0)
+        events = [
+            {
+                'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': round((start - origin) * 1e6), 'dur': round(duration * 1e6), 'args': args,
+            }
+            for name, start, duration, pid, tid, args in self.spans
+        ]
+        events.extend({'name': name, 'ph': 'C', 'pid': os.getpid(), 'ts': 0, 'args': {'value': value}}
+                      for name, value in self.counters.items())
+        output_dir = os.path.dirname(file_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        with open(file_path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+_profiler = None
+_NO_SPAN = contextlib.nullcontext()
+
+def install(profiler):
+    """
+    Sets the profiler the helpers below report into in this process. Pass None to disable profiling.
+    """
+    global _profiler
+    _profiler = profiler
+
+def current():
+    return _profiler
+
+def span(name, **args):
+    """
+    Context manager timing one phase. A shared no-op when profiling is off.
+    """
+    if _profiler is None:
+        return _NO_SPAN
+    return _profiler.span(name, args)
+
+def count(name, value=1):
+    if _profiler is not None:
+        _profiler.count(name, value)
+
+def error(exc):
+    """
+    Counts an exception by its class name.
+    """
+    if _profiler is not None:
+        _profiler.error(exc)
+
+def observe(metric, key, seconds):
+    """
+    Records one request latency under (`metric`, `key`), e.g. ('http', host) or ('dns', nameserver).
+    """
+    if _profiler is not None:
+        _profiler.observe(metric, key, seconds)
+
+def host_of(url):
+    return urlparse(url).netloc
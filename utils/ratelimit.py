@@ -0,0 +1,151 @@
+# utils/ratelimit.py
+
+import asyncio
+import multiprocessing
+import time
+
+class GlobalRateLimiter:
+    """
+    Request-rate limiter shared by every worker process of a run.
+    Each acquisition reserves the next free send slot `1/rate` seconds after the previous one,
+    with the slot clock kept in shared memory so the limit holds across the whole process pool.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next_slot = multiprocessing.Value('d', 0.0)
+
+    def reserve(self):
+        """
+        Reserves a slot and returns how many seconds the caller must wait before sending.
+        """
+        now = time.time()
+        with self._next_slot.get_lock():
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        return slot - now
+
+_limiter = None
+
+def install(limiter):
+    """
+    Sets the limiter used by wait()/wait_async() in this process. Pass None to disable limiting.
+    """
+    global _limiter
+    _limiter = limiter
+
+def wait():
+    """
+    Blocks until the installed limiter admits one request. No-op when none is installed.
+    """
+    if _limiter is not None:
+        delay = _limiter.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+async def wait_async():
+    """
+    Like wait(), but sleeps without blocking the event loop.
+    """
+    if _limiter is not None:
+        delay = _limiter.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class AdaptiveRate:
+    """
+    AIMD (additive-increase, multiplicative-decrease) controller for one brute-force run.
+    Requests are admitted through acquire() at the current rate and reported back through record().
+    At the end of every `window` seconds the rate is cut by `decrease` if any request signalled congestion
+    (timeouts, HTTP 429/503, DNS SERVFAIL); otherwise it grows as long as the error ratio stayed low, the mean
+    latency stayed within `latency_factor` times (or `latency_slack` seconds above) the lowest seen, and the rate was
+    actually the bottleneck. Like TCP slow start, it doubles until the first congestion or
+    latency signal, and only then settles into growing by `increase` per window.
+    """
+    def __init__(self, initial=50.0, min_rate=1.0, max_rate=20000.0, increase=10.0, decrease=0.5, window=0.5,
+                 max_error_ratio=0.05, latency_factor=3.0, latency_slack=0.025):
+        self.rate = float(initial)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.max_error_ratio = max_error_ratio
+        self.latency_factor = latency_factor
+        self.latency_slack = latency_slack
+        self.backoffs = 0
+        self.peak = self.rate
+        self.slow_start = True
+        self._next_slot = 0.0
+        self._baseline_latency = None
+        self._reset_window(time.monotonic())
+
+    def _reset_window(self, now):
+        self._window_start = now
+        self._samples = 0
+        self._errors = 0
+        self._congested = False
+        self._throttled = False
+        self._latency_sum = 0.0
+        self._latency_samples = 0
+
+    async def acquire(self):
+        """
+        Waits for the next send slot at the current rate.
+        """
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            self._throttled = True
+            await asyncio.sleep(slot - now)
+
+    def try_acquire(self):
+        """
+        Takes the next send slot only if it is already due; never waits.
+        """
+        now = time.monotonic()
+        if self._next_slot > now:
+            self._throttled = True
+            return False
+        self._next_slot = now + 1.0 / self.rate
+        return True
+
+    def record(self, latency=None, error=False, congestion=False):
+        """
+        Reports the outcome of one admitted request. `congestion` marks a back-off signal,
+        `error` any other failure; `latency` is the request's round-trip time in seconds.
+        """
+        self._samples += 1
+        if error or congestion:
+            self._errors += 1
+        if congestion:
+            self._congested = True
+        if latency is not None:
+            self._latency_sum += latency
+            self._latency_samples += 1
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._adjust()
+            self._reset_window(now)
+
+    def _adjust(self):
+        if self._congested:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.backoffs += 1
+            self.slow_start = False
+            return
+        # Error samples carry no latency, so the mean is over the requests that reported one
+        latency_ok = True
+        if self._latency_samples:
+            mean_latency = self._latency_sum / self._latency_samples
+            if self._baseline_latency is None or mean_latency < self._baseline_latency:
+                self._baseline_latency = mean_latency
+            latency_ok = mean_latency <= max(self._baseline_latency * self.latency_factor,
+                                             self._baseline_latency + self.latency_slack)
+        if not latency_ok:
+            self.slow_start = False
+        healthy = latency_ok and self._errors <= self._samples * self.max_error_ratio
+        if healthy and self._throttled:
+            grown = self.rate * 2 if self.slow_start else self.rate + self.increase
+            self.rate = min(self.max_rate, grown)
+            self.peak = max(self.peak, self.rate)
@@ -0,0 +1,112 @@
+# utils/reporter.py
+
+import json
+import sys
+import threading
+from collections import deque
+
+from rich.progress import Progress
+
+REFRESH_INTERVAL = 0.25
+# Verbose error lines rendered per refresh; the rest are only counted
+MAX_ERROR_LINES = 5
+
+class Reporter:
+    """
+    Takes brute-force findings off the scanning hot path: hit() and error() only append to a queue,
+    and a background thread renders everything queued every `interval` seconds in one console.print.
+    Misses are only counted. When the console is quiet (--quiet), nothing goes through rich: hits are
+    written to stdout as JSON lines instead.
+    """
+    def __init__(self, console, verbose=False, interval=REFRESH_INTERVAL):
+        self.console = console
+        self.verbose = verbose
+        self.machine = console.quiet
+        self.interval = interval
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lines = deque()
+        self._error_lines = deque()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def hit(self, markup, record):
+        """
+        Queues one finding: `markup` for the console, `record` (a dict) for machine mode.
+        """
+        self.hits += 1
+        self._lines.append(json.dumps(record) if self.machine else markup)
+
+    def miss(self):
+        self.misses += 1
+
+    def error(self, markup):
+        self.errors += 1
+        if self.verbose and not self.machine:
+            self._error_lines.append(markup)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        lines = []
+        while self._lines:
+            lines.append(self._lines.popleft())
+        errors = 0
+        while self._error_lines:
+            line = self._error_lines.popleft()
+            if errors < MAX_ERROR_LINES:
+                lines.append(line)
+            errors += 1
+        if errors > MAX_ERROR_LINES:
+            lines.append(f"[dim]    ... {errors - MAX_ERROR_LINES} more errors[/dim]")
+        if not lines:
+            return
+        if self.machine:
+            sys.stdout.write('\n'.join(lines) + '\n')
+            sys.stdout.flush()
+        else:
+            self.console.print('\n'.join(lines), highlight=False)
+
+    def close(self):
+        """
+        Stops the render thread, renders what is left and, with verbose, the collapsed counters.
+        """
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        if self.verbose and not self.machine and (self.misses or self.errors):
+            self.console.print(f"[dim]{self.hits} hits, {self.misses} misses, {self.errors} errors.[/dim]")
+
+class NullProgress:
+    """
+    Stand-in for rich's Progress in machine mode: same calls, no rendering.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add_task(self, *args, **kwargs):
+        return 0
+
+    def update(self, *args, **kwargs):
+        pass
+
+def make_progress(console, *columns, transient=False):
+    """
+    A rich Progress with `columns`, or a NullProgress when the console is quiet.
+    """
+    if console.quiet:
+        return NullProgress()
+    return Progress(*columns, console=console, transient=transient)
@@ -0,0 +1,107 @@
+# utils/scheduler.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from rich.table import Table
+
+from utils import profiler
+
+class Stage:
+    """
+    A unit of work for run_stages.
+    `func` is called with no arguments and its return value is stored under `name`.
+    `deps` lists stage names that must succeed first; `condition(results)` can veto the stage
+    based on their results. `cost` is how much of the global budget the stage occupies while running.
+    """
+    def __init__(self, name, func, deps=(), condition=None, cost=1):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.condition = condition
+        self.cost = cost
+
+def run_stages(stages, budget, console):
+    """
+    Runs `stages` as a dependency graph, starting every stage whose dependencies are done as soon as
+    enough of `budget` is free. A stage is skipped if a dependency failed or was skipped, or if its
+    condition returns False. Prints a per-stage timing table and returns {name: result}.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    results = {}
+    status = {}
+    timings = {}
+    pending = list(stages)
+    running = {}
+    available = budget
+    wall_start = time.perf_counter()
+
+    def run_timed(stage):
+        start = time.perf_counter()
+        try:
+            with profiler.span(f"stage: {stage.name}"):
+                return stage.func()
+        finally:
+            timings[stage.name] = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, len(stages))) as executor:
+        while pending or running:
+            for stage in list(pending):
+                dep_states = [status.get(dep) for dep in stage.deps]
+                if any(state in ('failed', 'skipped') for state in dep_states):
+                    status[stage.name] = 'skipped'
+                    pending.remove(stage)
+                    console.print(f"[dim][-] Skipping {stage.name}: a dependency did not complete.[/dim]")
+                    continue
+                if not all(state == 'done' for state in dep_states):
+                    continue
+                if stage.condition and not stage.condition({dep: results[dep] for dep in stage.deps}):
+                    status[stage.name] = 'skipped'
+                    pending.remove(stage)
+                    console.print(f"[dim][-] Skipping {stage.name}: condition not met.[/dim]")
+                    continue
+                # Oversized stages still run, but only once they have the whole budget to themselves
+                cost = min(stage.cost, budget)
+                if cost > available:
+                    continue
+                available -= cost
+                pending.remove(stage)
+                status[stage.name] = 'running'
+                running[executor.submit(run_timed, stage)] = (stage, cost)
+
+            if not running:
+                if pending:
+                    raise RuntimeError("Stage graph is stuck: " + ", ".join(stage.name for stage in pending))
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, cost = running.pop(future)
+                available += cost
+                try:
+                    results[stage.name] = future.result()
+                    status[stage.name] = 'done'
+                except Exception as e:
+                    status[stage.name] = 'failed'
+                    console.print(f"[bold red][!] Stage {stage.name} failed: {e}[/bold red]")
+
+    wall_time = time.perf_counter() - wall_start
+
+    table = Table(title="Stage Timing")
+    table.add_column("Stage", style="cyan")
+    table.add_column("Status")
+    table.add_column("Time (s)", justify="right")
+    for stage in stages:
+        elapsed = timings.get(stage.name)
+        table.add_row(stage.name, status[stage.name], f"{elapsed:.2f}" if elapsed is not None else "-")
+    console.print(table)
+    if timings:
+        console.print(
+            f"[dim]Wall time: {wall_time:.2f}s "
+            f"(longest stage {max(timings.values()):.2f}s, sequential sum {sum(timings.values()):.2f}s)[/dim]"
+        )
+    return results
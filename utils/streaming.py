@@ -0,0 +1,90 @@
+# utils/streaming.py
+
+import re
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+from collections import deque
+
+STDERR_TAIL_LINES = 20
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+# Elements dropped from their parent once handled, so a long nmap report never accumulates in memory
+NMAP_TRANSIENT_TAGS = ('port', 'host', 'taskbegin', 'taskprogress', 'taskend')
+
+def stream_command(cmd, parse_line, on_record):
+    """
+    Runs `cmd` and feeds its stdout to `parse_line` one line at a time as it arrives.
+    `parse_line(line)` returns a (possibly empty) list of records, each passed to `on_record` immediately.
+    Neither raw output nor records are kept, so memory stays constant however much the tool prints; stderr is
+    spooled to a temporary file and only its tail is read on failure. Returns the number of records.
+    """
+    count = 0
+    with tempfile.TemporaryFile(mode='w+') as stderr_file:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file, text=True, bufsize=1)
+        try:
+            for line in proc.stdout:
+                for record in parse_line(ANSI_RE.sub('', line)):
+                    count += 1
+                    on_record(record)
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            stderr_file.seek(0)
+            tail = ''.join(deque(stderr_file, maxlen=STDERR_TAIL_LINES)).strip()
+            raise subprocess.CalledProcessError(returncode, cmd, stderr=tail)
+    return count
+
+def host_address(host):
+    """
+    The IP address of an nmap <host> element (its MAC address is ignored).
+    """
+    for address in host.findall('address'):
+        if address.get('addrtype') in ('ipv4', 'ipv6'):
+            return address.get('addr')
+    return None
+
+def nmap_xml_parser(on_host=None, on_progress=None):
+    """
+    Returns a line parser for `nmap -oX -` that yields one record per <port> element as soon as it closes,
+    including the 'address' of the host it belongs to.
+    `on_host(address, state)` is called when a <host> element closes, and `on_progress(task, percent)` for every
+    <taskprogress> element (nmap emits those with --stats-every).
+    Parsed elements are cleared so memory does not grow with the size of the report.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+
+    def parse_line(line):
+        parser.feed(line)
+        records = []
+        for event, elem in parser.read_events():
+            if event == 'start':
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag == 'port':
+                state = elem.find('state')
+                service = elem.find('service')
+                service = service.attrib if service is not None else {}
+                host = next((parent for parent in reversed(stack) if parent.tag == 'host'), None)
+                records.append({
+                    'address': host_address(host) if host is not None else None,
+                    'port': int(elem.get('portid')),
+                    'protocol': elem.get('protocol'),
+                    'state': state.get('state') if state is not None else 'unknown',
+                    'service': service.get('name', ''),
+                    'product': service.get('product', ''),
+                    'version': service.get('version', ''),
+                    'extrainfo': service.get('extrainfo', ''),
+                })
+            elif elem.tag == 'host' and on_host:
+                status = elem.find('status')
+                on_host(host_address(elem), status.get('state') if status is not None else 'unknown')
+            elif elem.tag == 'taskprogress' and on_progress:
+                on_progress(elem.get('task', ''), float(elem.get('percent', 0)))
+            if elem.tag in NMAP_TRANSIENT_TAGS and stack:
+                stack[-1].remove(elem)
+        return records
+
+    return parse_line
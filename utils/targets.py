@@ -0,0 +1,59 @@
+# utils/targets.py
+
+import ipaddress
+import os
+import re
+
+def expand_target(spec):
+    """
+    Yields the hosts described by one target spec: a CIDR range (e.g. 10.0.0.0/24) expands to its
+    usable host addresses, anything else (IP or hostname) is yielded as-is.
+    """
+    spec = spec.strip()
+    if '/' in spec:
+        try:
+            network = ipaddress.ip_network(spec, strict=False)
+        except ValueError:
+            yield spec
+            return
+        if network.num_addresses == 1:
+            yield str(network.network_address)
+        else:
+            for host in network.hosts():
+                yield str(host)
+    elif spec:
+        yield spec
+
+def load_targets(target=None, input_file=None):
+    """
+    Collects targets from -t (comma-separated specs) and -iL (one spec per line, '#' comments allowed),
+    expanding CIDR ranges and dropping duplicates while keeping the original order.
+    """
+    specs = []
+    if target:
+        specs.extend(target.split(','))
+    if input_file:
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"Target list not found at {input_file}")
+        with open(input_file, 'r') as f:
+            specs.extend(line.split('#', 1)[0] for line in f)
+
+    seen = set()
+    targets = []
+    for spec in specs:
+        for host in expand_target(spec):
+            if host not in seen:
+                seen.add(host)
+                targets.append(host)
+    return targets
+
+def per_target_path(file_path, target):
+    """
+    Derives a per-target file name, e.g. results.json -> results.10.0.0.1.json.
+    """
+    safe_target = re.sub(r"[^A-Za-z0-9._-]", "_", target)
+    root, ext = os.path.splitext(file_path)
+    if ext.lower() == '.gz':
+        root, inner_ext = os.path.splitext(root)
+        ext = inner_ext + ext
+    return f"{root}.{safe_target}{ext}"
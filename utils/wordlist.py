@@ -0,0 +1,222 @@
+# utils/wordlist.py
+
+import mmap
+import os
+from array import array
+
+HASH_MASK = (1 << 64) - 1
+
+class CompactHashSet:
+    """
+    Open-addressing set of 64-bit fingerprints stored in a flat array,
+    about 16 bytes per entry instead of a full Python str per entry.
+    Fingerprint collisions are possible in theory but negligible at wordlist sizes.
+    """
+    def __init__(self, capacity=1024):
+        size = 1
+        while size < capacity * 2:
+            size <<= 1
+        self._slots = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        fingerprint = (hash(key) & HASH_MASK) or 1
+        slots, mask = self._slots, self._mask
+        i = fingerprint & mask
+        while slots[i]:
+            if slots[i] == fingerprint:
+                return True
+            i = (i + 1) & mask
+        return False
+
+    def add(self, key):
+        """
+        Adds `key` (bytes or str) and returns True if it was not already present.
+        """
+        fingerprint = (hash(key) & HASH_MASK) or 1
+        if self._insert(fingerprint):
+            self._count += 1
+            if self._count * 2 > len(self._slots):
+                self._grow()
+            return True
+        return False
+
+    def _insert(self, fingerprint):
+        slots, mask = self._slots, self._mask
+        i = fingerprint & mask
+        while True:
+            current = slots[i]
+            if current == 0:
+                slots[i] = fingerprint
+                return True
+            if current == fingerprint:
+                return False
+            i = (i + 1) & mask
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array('Q', bytes(16 * len(old)))
+        self._mask = len(self._slots) - 1
+        for fingerprint in old:
+            if fingerprint:
+                self._insert(fingerprint)
+
+class Wordlist:
+    """
+    Lazily reads a wordlist through mmap, yielding stripped, non-empty, non-comment entries.
+    Duplicates are dropped with a CompactHashSet unless `dedupe` is False.
+    len() counts entries with a streaming pass (cached), so no list is ever built.
+    """
+    def __init__(self, path, dedupe=True):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Wordlist not found at {path}")
+        self.path = path
+        self.dedupe = dedupe
+        self._count = None
+
+    def _lines(self):
+        if os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            seen = CompactHashSet() if self.dedupe else None
+            for raw in iter(mm.readline, b''):
+                raw = raw.strip()
+                if not raw or raw.startswith(b'#'):
+                    continue
+                if seen is not None and not seen.add(raw):
+                    continue
+                yield raw
+
+    def entries(self, offset=0, stride=1):
+        """
+        Yields entries starting at index `offset` and then every `stride`-th one,
+        so a wordlist can be partitioned between workers or resumed part-way through.
+        """
+        for index, raw in enumerate(self._lines()):
+            if index >= offset and (index - offset) % stride == 0:
+                yield raw.decode('utf-8', errors='replace')
+
+    def __iter__(self):
+        return self.entries()
+
+    def __len__(self):
+        if self._count is None:
+            self._count = sum(1 for _ in self._lines())
+        return self._count
+
+    def count(self, offset=0, stride=1):
+        """
+        Number of entries entries(offset, stride) will yield, computed arithmetically from len().
+        """
+        remaining = len(self) - offset
+        return max(0, (remaining + stride - 1) // stride)
+
+CASE_RULES = {
+    'lower': str.lower,
+    'upper': str.upper,
+    'capitalize': str.capitalize,
+}
+DEFAULT_BACKUP_SUFFIXES = ('~', '.bak', '.old')
+
+def _unique(values):
+    seen = []
+    for value in values:
+        if value and value not in seen:
+            seen.append(value)
+    return tuple(seen)
+
+class Expansion:
+    """
+    Lazily expands a Wordlist into every word x case variant x suffix x extension x backup candidate,
+    e.g. 'index' -> index, index.php, index.php~, Index, ... Candidates are generated one word at a time, so memory
+    stays bounded by the wordlist (a CompactHashSet of the case variants of the words already expanded) whatever the
+    size of the product. Entries ending in '/' are directories and only get case variants. No candidate comes out
+    twice: an extension a name already ends with is not added again, and a candidate an earlier word already produced
+    (index.php after index with -x php, admin after Admin with --case lower, a1.php~ after a1.php with backups) is
+    skipped. len() counts the candidates in one streaming pass (cached).
+    """
+    def __init__(self, wordlist, extensions=(), cases=(), suffixes=(), backups=()):
+        unknown = [rule for rule in cases if rule not in CASE_RULES]
+        if unknown:
+            raise ValueError(f"Unknown case rule(s): {', '.join(unknown)} (choose from {', '.join(CASE_RULES)})")
+        self.wordlist = wordlist
+        self.extensions = _unique(ext.strip().lstrip('.') for ext in extensions)
+        self.cases = _unique(cases)
+        self.suffixes = _unique(suffixes)
+        self.backups = _unique(backups)
+        self._count = None
+
+    def _case_variants(self, word):
+        variants = [word]
+        for rule in self.cases:
+            variant = CASE_RULES[rule](word)
+            if variant not in variants:
+                variants.append(variant)
+        return variants
+
+    def _candidates(self, word):
+        """
+        Every candidate for `word` on its own, in order and without repeats.
+        """
+        candidates = []
+        for variant in self._case_variants(word):
+            if variant.endswith('/'):
+                candidates.append(variant)
+                continue
+            for stem in (variant,) + tuple(variant + suffix for suffix in self.suffixes):
+                for name in (stem,) + tuple(f"{stem}.{ext}" for ext in self.extensions if not stem.endswith(f".{ext}")):
+                    candidates.append(name)
+                    candidates.extend(name + backup for backup in self.backups)
+        return list(dict.fromkeys(candidates))
+
+    def _produced_by(self, candidate, variants):
+        """
+        Whether some word whose case variant is in `variants` expands into `candidate`: the candidate is taken apart
+        into variant + suffix + extension + backup every way the rules allow, and each variant part is looked up.
+        """
+        for backup in ('',) + self.backups:
+            if not candidate.endswith(backup):
+                continue
+            name = candidate[:len(candidate) - len(backup)]
+            for ext in ('',) + self.extensions:
+                if ext:
+                    stem = name[:-len(ext) - 1]
+                    if not name.endswith(f".{ext}") or stem.endswith(f".{ext}"):
+                        continue
+                else:
+                    stem = name
+                for suffix in ('',) + self.suffixes:
+                    if not stem.endswith(suffix):
+                        continue
+                    variant = stem[:len(stem) - len(suffix)]
+                    if not variant or (variant.endswith('/') and variant != candidate):
+                        continue
+                    if variant in variants:
+                        return True
+        return False
+
+    def _expansions(self):
+        """
+        Yields each word's candidates minus those an earlier word already produced.
+        """
+        variants = CompactHashSet()
+        for word in self.wordlist:
+            yield [candidate for candidate in self._candidates(word) if not self._produced_by(candidate, variants)]
+            for variant in self._case_variants(word):
+                variants.add(variant)
+
+    def __iter__(self):
+        for candidates in self._expansions():
+            yield from candidates
+
+    def __len__(self):
+        if self._count is None:
+            if not (self.cases or self.extensions or self.suffixes or self.backups):
+                self._count = len(self.wordlist)
+            else:
+                self._count = sum(len(candidates) for candidates in self._expansions())
+        return self._count